@@ -0,0 +1,48 @@
+"""Reproducible synthetic corpus of Russian/English social media texts."""
+import random
+from typing import List
+
+RU_WORDS = [
+    "привет", "как", "дела", "спасибо", "сегодня", "очень", "красивая", "мама",
+    "мыла", "раму", "модернизация", "город", "работа", "новости", "смотрите",
+    "подпишись", "канал", "вопрос", "ответ", "думаю", "хорошо", "плохо", "это",
+    "для", "набор", "тестовый", "аугментаций", "Москва", "Россия", "Привет",
+]
+EN_WORDS = [
+    "hello", "world", "this", "is", "a", "test", "great", "video", "check",
+    "out", "my", "channel", "thanks", "lol", "The", "News", "today",
+]
+EXTRAS = [
+    ",", ".", "!", "?", "...", "!!!", ":)", ":-D", ";)", "<3", "😀", "👍", "🔥",
+    "#новости", "@user_1", "https://github.com/Astromis/textfab/issues/10",
+    "www.example.com", "+7-910-221-22-22", "89103123167", "2024", "\n", "Модерниза́ция",
+]
+
+
+def make_text(rng: random.Random, n_words: int) -> str:
+    pieces = []
+    for _ in range(n_words):
+        r = rng.random()
+        if r < 0.6:
+            pieces.append(rng.choice(RU_WORDS))
+        elif r < 0.8:
+            pieces.append(rng.choice(EN_WORDS))
+        else:
+            pieces.append(rng.choice(EXTRAS))
+    return " ".join(pieces)
+
+
+def make_corpus(size: int, min_words: int, max_words: int, seed: int = 0) -> List[str]:
+    """Generate the texts with the word count from `min_words` to `max_words`."""
+    rng = random.Random(seed)
+    return [make_text(rng, rng.randint(min_words, max_words)) for _ in range(size)]
+
+
+def short_texts(size: int, seed: int = 0) -> List[str]:
+    """Comments and tweets."""
+    return make_corpus(size, 1, 30, seed)
+
+
+def long_texts(size: int, seed: int = 0) -> List[str]:
+    """Posts and articles."""
+    return make_corpus(size, 300, 2000, seed)
@@ -0,0 +1,236 @@
+"""Throughput benchmarks of the units, augmentations and fabric modes.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --output new.json --compare old.json
+
+The results are written as JSON, so the numbers of different textfab
+versions can be compared. A benchmark that can't run in the environment
+(e.g. mystem binary or nltk data is missing) is recorded with the error.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from corpus import long_texts, short_texts
+
+from textfab import augmentations, units
+from textfab.fabric import Fabric
+
+UNIT_PARAMS = {
+    "remove_custom_regex": {"regex": "[0-9]+"},
+    "segment_by_sentences": {"language": "russian"},
+    "apply_butter_finger": {"seed": 42},
+    "apply_random_token_swap": {"seed": 42},
+    "apply_random_token_deletion": {"seed": 42},
+    "apply_changing_token_char_case": {"seed": 42},
+}
+# The units that consume the list of tokens instead of the string.
+TOKEN_UNITS = {
+    "detokenize_with_space",
+    "apply_butter_finger",
+    "apply_random_token_swap",
+    "apply_random_token_deletion",
+    "apply_changing_token_char_case",
+}
+AUGMENTATIONS = {
+    "butter_finger": augmentations.butter_finger,
+    "random_swap": augmentations.random_swap,
+    "random_deletion": augmentations.random_deletion,
+    "change_char_case": augmentations.change_char_case,
+}
+FABRIC_CONFIG = [
+    "swap_enter_to_space",
+    "remove_links",
+    "remove_emoji",
+    "remove_punct",
+    "lower_string",
+    "collapse_spaces",
+    "strip_string",
+]
+
+
+def textfab_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("textfab")
+    except Exception:
+        return "unknown"
+
+
+def measure(name: str, fn: Callable[[], Any], texts: List[Any], repeat: int) -> Dict[str, Any]:
+    """Run the benchmark `repeat` times and keep the best time."""
+    result = {"name": name, "texts": len(texts)}
+    try:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+    size = sum(len(text) for text in texts)
+    result.update(
+        seconds=best,
+        texts_per_sec=len(texts) / best if best else None,
+        size_per_sec=size / best if best else None,
+    )
+    return result
+
+
+def bench_units(texts: List[str], tokens: List[List[str]], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for name, cls in sorted(units.UNITS.items()):
+        data = tokens if name in TOKEN_UNITS else texts
+        try:
+            unit = cls(UNIT_PARAMS[name]) if name in UNIT_PARAMS else cls()
+        except Exception as e:
+            results.append({"name": f"unit/{name}", "error": f"{type(e).__name__}: {e}"})
+            continue
+        results.append(
+            measure(f"unit/{name}", lambda: unit.process_batch(data), data, repeat)
+        )
+    return results
+
+
+def bench_augmentations(tokens: List[List[str]], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for name, fn in AUGMENTATIONS.items():
+        results.append(
+            measure(
+                f"augmentation/{name}",
+                lambda: [fn(t, seed=42) for t in tokens],
+                tokens,
+                repeat,
+            )
+        )
+    return results
+
+
+def bench_tokenize(texts: List[str], offsets: bool = False) -> None:
+    from textfab.emoji_tokenizer import tokenize, tokenize_offsets
+
+    fn = tokenize_offsets if offsets else tokenize
+    for text in texts:
+        fn(text)
+
+
+def bench_fabric(name: str, texts: List[str], pool_sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    fab = Fabric(FABRIC_CONFIG)
+    results = [measure(f"fabric/{name}/serial", lambda: fab(texts), texts, repeat)]
+    for pool_size in pool_sizes:
+        results.append(
+            measure(
+                f"fabric/{name}/pool_{pool_size}",
+                lambda: fab(texts, pool_size=pool_size),
+                texts,
+                repeat,
+            )
+        )
+        results.append(
+            measure(
+                f"fabric/{name}/thread_{pool_size}",
+                lambda: fab(texts, pool_size=pool_size, backend="thread"),
+                texts,
+                repeat,
+            )
+        )
+        shared_fab = Fabric(FABRIC_CONFIG, transport="shared_memory")
+        results.append(
+            measure(
+                f"fabric/{name}/shared_memory_{pool_size}",
+                lambda: shared_fab(texts, pool_size=pool_size),
+                texts,
+                repeat,
+            )
+        )
+        with fab.start_workers(pool_size):
+            results.append(
+                measure(
+                    f"fabric/{name}/workers_{pool_size}",
+                    lambda: fab(texts),
+                    texts,
+                    repeat,
+                )
+            )
+    results.append(measure(f"fabric/{name}/auto", lambda: fab(texts, backend="auto"), texts, repeat))
+    return results
+
+
+def bench_schedule(name: str, texts: List[str], pool_sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    fab = Fabric(FABRIC_CONFIG)
+    results = []
+    for pool_size in pool_sizes:
+        for schedule in ["count", "length"]:
+            results.append(
+                measure(
+                    f"fabric/{name}/pool_{pool_size}/{schedule}",
+                    lambda: fab(texts, pool_size=pool_size, schedule=schedule),
+                    texts,
+                    repeat,
+                )
+            )
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    print(f"{'benchmark':50} {'baseline, s':>12} {'current, s':>12} {'speedup':>8}")
+    for r in results:
+        old = baseline.get(r["name"])
+        if old is None or "seconds" not in old or "seconds" not in r:
+            continue
+        print(f"{r['name']:50} {old['seconds']:12.4f} {r['seconds']:12.4f} {old['seconds'] / r['seconds']:8.2f}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2000, help="amount of short texts")
+    parser.add_argument("--long-size", type=int, default=100, help="amount of long texts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of every benchmark")
+    parser.add_argument("--pool-sizes", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--seed", type=int, default=0, help="seed of the corpus generator")
+    parser.add_argument("--output", help="path to the JSON with the results")
+    parser.add_argument("--compare", help="path to the JSON with the baseline results")
+    args = parser.parse_args(argv)
+
+    short = short_texts(args.size, args.seed)
+    long = long_texts(args.long_size, args.seed)
+    tokens = [text.split() for text in short]
+
+    results = []
+    results += bench_units(short, tokens, args.repeat)
+    results += bench_augmentations(tokens, args.repeat)
+    results.append(measure("emoji_tokenizer/tokenize", lambda: bench_tokenize(short), short, args.repeat))
+    results.append(
+        measure("emoji_tokenizer/tokenize_offsets", lambda: bench_tokenize(short, True), short, args.repeat)
+    )
+    results += bench_fabric("short", short, args.pool_sizes, args.repeat)
+    results += bench_fabric("long", long, args.pool_sizes, args.repeat)
+    # the long texts are gathered at the end, so the equal chunks are skewed
+    results += bench_schedule("mixed", short + long, args.pool_sizes, args.repeat)
+
+    report = {
+        "textfab_version": textfab_version(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "params": vars(args),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,11 @@ setuptools.setup(
     install_requires=["pymystem3>=0.2.0",
                       "nltk>=3.6.7",
                       "omegaconf>=2.3.0",
-                      "pandas>=1.3.4"],
+                      "pandas>=1.3.4",
+                      "numpy>=1.17"],
+    extras_require={"arrow": ["pyarrow>=10.0.0"]},
     include_package_data=True,
+    entry_points={
+        "console_scripts": ["textfab=textfab.cli:main"],
+    },
 )
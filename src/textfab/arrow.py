@@ -0,0 +1,202 @@
+"""Apache Arrow and Parquet input and output of the fabric.
+
+The data is processed by record batches: only the texts of the batches in
+flight are converted to python strings, the processed ones are turned into
+an Arrow array right away and the rest of the columns are passed as is.
+The nulls of the text column are kept and not sent to the conveyer.
+
+pyarrow is an optional dependency: pip install textfab[arrow]
+"""
+from collections import deque
+from itertools import tee
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Optional, Tuple
+
+from .tokens import TokenizedText
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+    from .fabric import Fabric
+
+
+def _texts(array: "pa.Array") -> Tuple[List[str], Optional[List[bool]]]:
+    """Python strings of the array without the nulls and the validity of the values."""
+    values = array.to_pylist()
+    if not array.null_count:
+        return values, None
+    return [v for v in values if v is not None], [v is not None for v in values]
+
+
+def _with_nulls(processed: List[Any], valid: Optional[List[bool]]) -> List[Any]:
+    if valid is None:
+        return processed
+    processed = iter(processed)
+    return [next(processed) if is_valid else None for is_valid in valid]
+
+
+class _ArrayBuilder:
+    """Build the arrays of the processed texts with the same type for every batch."""
+
+    def __init__(self, source_type: "pa.DataType") -> None:
+        self.source_type = source_type
+        self.type = None
+
+    def build(self, processed: List[Any]) -> "pa.Array":
+        import pyarrow as pa
+
+        # Arrow has no type for the offsets, the tokens are written as lists
+        processed = [text.tolist() if isinstance(text, TokenizedText) else text for text in processed]
+
+        if self.type is not None:
+            return pa.array(processed, type=self.type)
+        array = pa.array(processed)
+        is_text = pa.types.is_string(self.source_type) or pa.types.is_large_string(self.source_type)
+        if is_text and (pa.types.is_null(array.type) or pa.types.is_string(array.type)):
+            # the strings stay large and the nulls stay strings
+            array = array.cast(self.source_type)
+        if len(array) > array.null_count:
+            self.type = array.type
+        return array
+
+
+def _process_arrays(
+    fab: "Fabric",
+    arrays: Iterable["pa.Array"],
+    source_type: "pa.DataType",
+    pool_size: Optional[int],
+    backend: Optional[str] = None,
+) -> Iterator["pa.Array"]:
+    arrays, source_arrays = tee(arrays)
+    validity = deque()
+
+    def chunks():
+        for array in source_arrays:
+            texts, valid = _texts(array)
+            validity.append(valid)
+            yield texts
+
+    builder = _ArrayBuilder(source_type)
+    for array, processed in zip(arrays, fab._run_backend(chunks(), pool_size, True, backend)):
+        valid = validity.popleft()
+        if len(processed) != len(array) - array.null_count:
+            raise ValueError(
+                "Text amount integrity  violated: the source text amount doesn't match with processed text."
+            )
+        yield builder.build(_with_nulls(processed, valid))
+
+
+def _with_column(batch: "pa.RecordBatch", name: str, array: "pa.Array") -> "pa.RecordBatch":
+    import pyarrow as pa
+
+    names = batch.schema.names
+    arrays = list(batch.columns)
+    if name in names:
+        arrays[names.index(name)] = array
+    else:
+        names = names + [name]
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def process_batches(
+    fab: "Fabric",
+    batches: Iterable["pa.RecordBatch"],
+    column: str,
+    output_column: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    backend: Optional[str] = None,
+) -> Iterator["pa.RecordBatch"]:
+    """Process the text column of the record batches lazily.
+
+    Args:
+        fab (Fabric): the fabric.
+        batches (Iterable[pa.RecordBatch]): the data.
+        column (str): the column with the texts.
+        output_column (str, optional): the column for the result, the text
+            column is replaced by default.
+        pool_size (int): amount of workers. The persistent workers are used
+            if they were started.
+        backend (str, optional): the backend of the workers, see `Fabric.__call__`.
+    """
+    batches, source_batches = tee(batches)
+    first = next(source_batches, None)
+    if first is None:
+        return
+    if column not in first.schema.names:
+        raise ValueError(f"The column {column} is not found")
+
+    def arrays():
+        yield first.column(column)
+        for batch in source_batches:
+            yield batch.column(column)
+
+    source_type = first.schema.field(column).type
+    for batch, array in zip(batches, _process_arrays(fab, arrays(), source_type, pool_size, backend)):
+        yield _with_column(batch, output_column or column, array)
+
+
+def process_arrow(
+    fab: "Fabric",
+    data: "pa.Array | pa.ChunkedArray | pa.RecordBatch | pa.Table",
+    column: Optional[str] = None,
+    output_column: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    backend: Optional[str] = None,
+) -> "pa.Array | pa.ChunkedArray | pa.RecordBatch | pa.Table":
+    """Process the Arrow data, see `Fabric.process_arrow`."""
+    import pyarrow as pa
+
+    if isinstance(data, pa.Array):
+        return next(_process_arrays(fab, [data], data.type, pool_size, backend))
+    if isinstance(data, pa.ChunkedArray):
+        chunks = list(_process_arrays(fab, data.chunks, data.type, pool_size, backend))
+        if not chunks:
+            return data
+        return pa.chunked_array(chunks, type=chunks[0].type)
+    if column is None:
+        raise ValueError("The column with the texts is required for the record batches and tables")
+    if isinstance(data, pa.RecordBatch):
+        return next(process_batches(fab, [data], column, output_column, pool_size, backend))
+    if isinstance(data, pa.Table):
+        batches = list(process_batches(fab, data.to_batches(), column, output_column, pool_size, backend))
+        if batches:
+            return pa.Table.from_batches(batches)
+        # the empty table has no batches, the output column is added as in the other tables
+        if column not in data.schema.names:
+            raise ValueError(f"The column {column} is not found")
+        if output_column is None or output_column in data.schema.names:
+            return data
+        field = data.schema.field(column).with_name(output_column)
+        return data.append_column(field, pa.chunked_array([], type=field.type))
+    raise ValueError(f"Unknown type of the Arrow data {type(data).__name__}")
+
+
+def process_parquet(
+    fab: "Fabric",
+    source: str,
+    destination: str,
+    column: str,
+    output_column: Optional[str] = None,
+    batch_size: int = 65536,
+    pool_size: Optional[int] = None,
+    backend: Optional[str] = None,
+) -> None:
+    """Process the text column of the Parquet file, see `Fabric.process_parquet`."""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(source)
+    writer = None
+    try:
+        batches = parquet_file.iter_batches(batch_size=batch_size)
+        for batch in process_batches(fab, batches, column, output_column, pool_size, backend):
+            if writer is None:
+                writer = pq.ParquetWriter(destination, batch.schema)
+            writer.write_batch(batch)
+        if writer is None:
+            schema = parquet_file.schema_arrow
+            if output_column is not None and output_column not in schema.names:
+                schema = schema.append(schema.field(column).with_name(output_column))
+            writer = pq.ParquetWriter(destination, schema)
+    finally:
+        if writer is not None:
+            writer.close()
@@ -1,11 +1,69 @@
 """From https://github.com/RussianNLP/rutransform/tree/main"""
 
-from typing import List, Optional
-import random
-from copy import deepcopy
-from nltk.corpus import stopwords
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+from functools import lru_cache
 
-STOPWORDS = stopwords.words("russian")
+from array import array
+
+from .tokens import OFFSET_TYPE, TokenizedText, take_tokens
+
+
+@lru_cache(maxsize=None)
+def get_stopwords() -> tuple:
+    """Russian stop words from nltk, loaded on the first use."""
+    from nltk.corpus import stopwords
+
+    return tuple(stopwords.words("russian"))
+
+
+@lru_cache(maxsize=None)
+def _stopword_set() -> frozenset:
+    return frozenset(get_stopwords())
+
+
+def __getattr__(name):
+    # STOPWORDS used to be loaded at import time, keep it available lazily.
+    if name == "STOPWORDS":
+        return list(get_stopwords())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Keyboard neighbors of the lowercase letters of the russian layout.
+KEY_APPROX = {
+    "й": "йцфыувяч",
+    "ц": "цйуыфвкасч",
+    "у": "уцкыавйфячсмпе",
+    "к": "куевпацычсмпе",
+    "е": "екнарпувсмитог",
+    "н": "негпоркамитош",
+    "г": "гншрлоепитьдщ",
+    "ш": "шгщодлнртьдз",
+    "щ": "щшзлдгоь",
+    "з": "здщхэшл",
+    "х": "хзъэж\\щдю.",
+    "ъ": "ъх\\зэж.",
+    "ф": "фйыяцчцвсу",
+    "ы": "ыцчфвкам",
+    "в": "вусыафйпим",
+    "а": "авпкмцычнрт",
+    "п": "пеиарувснот",
+    "р": "рнтпоакмлшь",
+    "о": "орлтгпеидщь",
+    "л": "лодштнрт",
+    "д": "дщльзгот",
+    "ж": "жз.дэх\\ю",
+    "э": "эхж\\зъ.",
+    "я": "яфчымву",
+    "ч": "чясывимакуцй",
+    "с": "счмваяыцукпи",
+    "м": "мсаипчвукент",
+    "и": "имтпрсаенгт",
+    "т": "тиьромпегшл",
+    "ь": "ьтлодщшл",
+    "б": "блдьюож",
+    "ю": "юджб.ьл",
+    " ": " ",
+}
 
 
 def butter_finger(
@@ -19,6 +77,8 @@ def butter_finger(
     """
     Adds typos to text the sentence using keyboard distance
 
+    The single text version of `butter_finger_batch`.
+
     Parameters
     ----------
     text: List[str]
@@ -39,70 +99,7 @@ def butter_finger(
     List[str]
         list of transformed sentences
     """
-    if seed is not None:
-        random.seed(seed)
-    key_approx = {
-        "й": "йцфыувяч",
-        "ц": "цйуыфвкасч",
-        "у": "уцкыавйфячсмпе",
-        "к": "куевпацычсмпе",
-        "е": "екнарпувсмитог",
-        "н": "негпоркамитош",
-        "г": "гншрлоепитьдщ",
-        "ш": "шгщодлнртьдз",
-        "щ": "щшзлдгоь",
-        "з": "здщхэшл",
-        "х": "хзъэж\щдю.",
-        "ъ": "ъх\зэж.",
-        "ф": "фйыяцчцвсу",
-        "ы": "ыцчфвкам",
-        "в": "вусыафйпим",
-        "а": "авпкмцычнрт",
-        "п": "пеиарувснот",
-        "р": "рнтпоакмлшь",
-        "о": "орлтгпеидщь",
-        "л": "лодштнрт",
-        "д": "дщльзгот",
-        "ж": "жз.дэх\ю",
-        "э": "эхж\зъ.",
-        "я": "яфчымву",
-        "ч": "чясывимакуцй",
-        "с": "счмваяыцукпи",
-        "м": "мсаипчвукент",
-        "и": "имтпрсаенгт",
-        "т": "тиьромпегшл",
-        "ь": "ьтлодщшл",
-        "б": "блдьюож",
-        "ю": "юджб.ьл",
-        " ": " ",
-    }
-    if stop_words is None:
-        stop_words = []
-
-    transformed_texts = deepcopy(text)
-    for _ in range(try_numbers):
-        for i, word in enumerate(text):
-            if random.uniform(0, 1) <= prob_token_pass:
-                transformed_texts[i] = word
-            elif word in stop_words:
-                transformed_texts[i] = word
-            else:
-                new_word = ""
-                for letter in word:
-                    lcletter = letter.lower()
-                    if lcletter not in key_approx.keys():
-                        new_letter = lcletter
-                    else:
-                        if random.uniform(0, 1) <= prob:
-                            new_letter = random.choice(key_approx[lcletter])
-                        else:
-                            new_letter = lcletter
-                    # go back to original case
-                    if not lcletter == letter:
-                        new_letter = new_letter.upper()
-                    new_word += new_letter
-                transformed_texts[i] = new_word
-    return transformed_texts
+    return butter_finger_batch([text], prob, prob_token_pass, try_numbers, stop_words, seed)[0]
 
 
 def random_deletion(
@@ -115,6 +112,8 @@ def random_deletion(
     """
     Randomly deletes words from the sentence with probability p
 
+    The single text version of `random_deletion_batch`.
+
     Parameters
     ----------
     text: List[str]
@@ -133,41 +132,7 @@ def random_deletion(
     List[str]
         transformed sentence in tokens
     """
-    if seed is not None:
-        random.seed(seed)
-    # if there's only one word, don't delete it
-    if len(text) <= 1:
-        return text
-
-    # randomly delete words with probability p
-    words_copy = deepcopy(text)
-    for _ in range(try_numbers):
-        new_words = []
-        for idx, word in enumerate(words_copy):
-            if idx in stop_words:
-                new_words.append(word)
-                continue
-            r = random.uniform(0, 1)
-            if r > prob:
-                new_words.append(word)
-        words_copy = deepcopy(new_words)
-
-    # if you end up deleting all words, just return a random word
-    if len(new_words) == 0:
-        rand_int = random.randint(0, len(text) - 1)
-        return [text[rand_int]]
-
-    if new_words == text:
-        stopwords = [
-            i
-            for (i, word) in enumerate(text)
-            if (word in STOPWORDS and i not in stop_words)
-        ]
-        if len(stopwords) > 0:
-            random_idx = random.choice(stopwords)
-            new_words.pop(random_idx)
-
-    return new_words
+    return random_deletion_batch([text], prob, try_numbers, stop_words, seed)[0]
 
 
 def random_swap(
@@ -179,6 +144,8 @@ def random_swap(
     """
     Randomly swap two words in the sentence
 
+    The single text version of `random_swap_batch`.
+
     Parameters
     ----------
     words: List[str]
@@ -195,23 +162,7 @@ def random_swap(
     List[str]
         transformed sentence in tokens
     """
-    if seed is not None:
-        random.seed(seed)
-    new_words = words.copy()
-    allowed_words = [word for word in words if word not in stop_words]
-    if len(allowed_words) == 1:
-        return new_words
-
-    for _ in range(try_numbers):
-        word_1, word_2 = random.choice(allowed_words), random.choice(allowed_words)
-        word_idx_1, word_idx_2 = words.index(word_1), words.index(word_2)
-
-        new_words[word_idx_1], new_words[word_idx_2] = (
-            new_words[word_idx_2],
-            new_words[word_idx_1],
-        )
-
-    return new_words
+    return random_swap_batch([words], try_numbers, stop_words, seed)[0]
 
 
 def change_char_case(
@@ -225,6 +176,8 @@ def change_char_case(
     """
     Changes character cases randomly
 
+    The single text version of `change_char_case_batch`.
+
     Parameters
     ----------
     text: str
@@ -232,7 +185,7 @@ def change_char_case(
     prob: float
         probability of the transformation (default is 0.1)
     prob_token_pass: float
-        probability of the transformation of the particular token (default is 0.1)
+        kept for compatibility, the tokens are never passed (default is 0.1)
     try_numbers: int
         how much the transformation is applied (default is 1)
     seed: int
@@ -245,24 +198,441 @@ def change_char_case(
     List[str]
         list of transformed sentences
     """
-    if seed is not None:
-        random.seed(seed)
-    transformed_texts = deepcopy(text)
-    for _ in range(try_numbers):
-        for i, word in enumerate(transformed_texts):
-            if random.uniform(0, 1) <= prob_token_pass:
-                transformed_texts[i] = word
-            if word in stop_words:
-                new_word = word
-            else:
-                new_word = ""
-                for c in word:
-                    if random.uniform(0, 1) < prob:
-                        if c.isupper():
-                            new_word += c.lower()
-                        elif c.islower():
-                            new_word += c.upper()
-                    else:
-                        new_word += c
-            transformed_texts[i] = new_word
-    return transformed_texts
+    return change_char_case_batch([text], prob, prob_token_pass, try_numbers, seed, stop_words)[0]
+
+
+# Batched versions of the augmentations, the functions above run them on a
+# single text. The random numbers are drawn for the whole batch at once with
+# numpy. Every number is keyed by the seed, the index of the text and the
+# place of the draw in the text, so the result of a text doesn't depend on
+# the batching. They give other results than the original random-module
+# implementations with the same seed.
+
+_MASK = (1 << 64) - 1
+_GAMMA = 0x9E3779B97F4A7C15
+
+
+def _mix_int(x: int) -> int:
+    """splitmix64 finalizer on python ints."""
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9 & _MASK
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EB & _MASK
+    return x ^ (x >> 31)
+
+
+def _mix(x: Any) -> Any:
+    """splitmix64 finalizer on numpy uint64 arrays."""
+    import numpy as np
+
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class TextRandom:
+    """Counter-based random numbers of a batch of texts.
+
+    A number depends only on the seed, the key, the index of the text and
+    the element and the draw it is used for, so the same text with the same
+    index gets the same numbers in any batch or worker.
+
+    Args:
+        seed (int, optional): base seed, a random one if not given.
+        indices (Iterable[int], optional): indices of the batch texts in the
+            corpus, their positions in the batch by default.
+        key (Tuple[int, ...]): extra key of the numbers, e.g. the position of
+            the unit in the conveyer.
+    """
+
+    def __init__(
+        self, seed: Optional[int] = None, indices: Optional[Iterable[int]] = None, key: Tuple[int, ...] = ()
+    ) -> None:
+        import numpy as np
+
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        state = _mix_int(seed & _MASK)
+        for k in key:
+            state = _mix_int((state + (k + 1) * _GAMMA) & _MASK)
+        self.state = np.uint64(state)
+        if indices is None:
+            self.indices = None
+        elif isinstance(indices, range):
+            self.indices = np.arange(indices.start, indices.stop, indices.step, dtype=np.uint64)
+        else:
+            self.indices = np.asarray(list(indices), dtype=np.uint64)
+
+    def uniform(self, texts: Any, elements: Any, draw: int) -> Any:
+        """Numbers in [0, 1).
+
+        Args:
+            texts (np.ndarray): positions of the texts in the batch.
+            elements (np.ndarray): indices of the elements in the texts,
+                e.g. of the tokens or characters.
+            draw (int): index of the draw of the element.
+        """
+        import numpy as np
+
+        texts = np.asarray(texts, dtype=np.uint64)
+        if self.indices is not None:
+            texts = self.indices[texts]
+        gamma = np.uint64(_GAMMA)
+        x = _mix(self.state + (texts + np.uint64(1)) * gamma)
+        x = _mix(x + (np.asarray(elements, dtype=np.uint64) + np.uint64(1)) * gamma)
+        x = _mix(x + np.uint64((draw + 1) * _GAMMA & _MASK))
+        return (x >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+def _is_compact(texts: Sequence[Sequence[str]]) -> bool:
+    return bool(texts) and all(isinstance(text, TokenizedText) for text in texts)
+
+
+def _copy_tokens(text: Sequence[str]) -> Sequence[str]:
+    return text if isinstance(text, TokenizedText) else list(text)
+
+
+def _flatten(texts: Sequence[Sequence[str]]) -> Tuple[Any, Any, Any]:
+    """Codepoints of all tokens of the batch with the token and text lengths."""
+    import numpy as np
+
+    text_lengths = np.array(list(map(len, texts)), dtype=np.int64)
+    if _is_compact(texts):
+        # the characters of the tokens are gathered from the strings of the texts
+        # without slicing every token
+        strings = [text.text for text in texts]
+        string_codes = np.frombuffer("".join(strings).encode("utf-32-le"), dtype=np.uint32)
+        string_starts = np.cumsum([0] + list(map(len, strings[:-1])), dtype=np.int64)
+        shifts = np.repeat(string_starts, text_lengths)
+        starts = np.concatenate([np.frombuffer(text.starts, dtype=np.intc) for text in texts]) + shifts
+        ends = np.concatenate([np.frombuffer(text.ends, dtype=np.intc) for text in texts]) + shifts
+        token_lengths = ends - starts
+        char_starts = np.repeat(starts - (token_lengths.cumsum() - token_lengths), token_lengths)
+        codes = string_codes[char_starts + np.arange(token_lengths.sum())]
+        return codes, token_lengths, text_lengths
+    tokens = [token for text in texts for token in text]
+    codes = np.frombuffer("".join(tokens).encode("utf-32-le"), dtype=np.uint32).copy()
+    token_lengths = np.array(list(map(len, tokens)), dtype=np.int64)
+    return codes, token_lengths, text_lengths
+
+
+def _unflatten(codes: Any, token_lengths: Any, text_lengths: Any, compact: bool = False) -> List[Sequence[str]]:
+    """Split the codepoints back into the texts, `TokenizedText` if `compact`."""
+    import numpy as np
+
+    joined = codes.tobytes().decode("utf-32-le")
+    bounds = np.concatenate([[0], token_lengths.cumsum()])
+    text_bounds = [0] + text_lengths.cumsum().tolist()
+    if compact:
+        result = []
+        for i in range(len(text_lengths)):
+            token_bounds = bounds[text_bounds[i]:text_bounds[i + 1] + 1]
+            offset = int(token_bounds[0])
+            offsets = (token_bounds - offset).astype(np.intc)
+            starts = array(OFFSET_TYPE, offsets[:-1].tobytes())
+            ends = array(OFFSET_TYPE, offsets[1:].tobytes())
+            result.append(TokenizedText(joined[offset:int(token_bounds[-1])], starts, ends))
+        return result
+    bounds = bounds.tolist()
+    tokens = [joined[bounds[i]:bounds[i + 1]] for i in range(len(token_lengths))]
+    return [tokens[text_bounds[i]:text_bounds[i + 1]] for i in range(len(text_lengths))]
+
+
+def _positions(text_ids: Any, n_texts: int) -> Any:
+    """Index of every element in its text, the elements go in the text order."""
+    import numpy as np
+
+    counts = np.bincount(text_ids, minlength=n_texts)
+    return np.arange(len(text_ids)) - np.repeat(counts.cumsum() - counts, counts)
+
+
+def _active_tokens(texts: List[List[str]], stop_words: Iterable[str], pass_mask: Any) -> Any:
+    import numpy as np
+
+    stop_words = set(stop_words or ())
+    if stop_words:
+        is_stop = np.fromiter(
+            (token in stop_words for text in texts for token in text), dtype=bool, count=len(pass_mask)
+        )
+        return ~pass_mask & ~is_stop
+    return ~pass_mask
+
+
+@lru_cache(maxsize=None)
+def _keyboard_tables() -> Tuple[Any, Any, Any, Any, Any]:
+    """Lookup tables of KEY_APPROX indexed by the codepoint.
+
+    Returns the row of the letter (-1 if it has no neighbors) for both cases,
+    the letter of a row, the amount of its neighbors and the neighbors
+    themselves in the lower and the upper case.
+    """
+    import numpy as np
+
+    keys = list(KEY_APPROX)
+    size = max(max(ord(c), ord(c.upper())) for c in keys) + 1
+    rows = np.full(size, -1, dtype=np.int64)
+    for i, key in enumerate(keys):
+        rows[ord(key)] = i
+        rows[ord(key.upper())] = i
+    key_codes = np.array([ord(key) for key in keys], dtype=np.uint32)
+    counts = np.array([len(KEY_APPROX[key]) for key in keys], dtype=np.int64)
+    width = counts.max()
+    lower = np.zeros((len(keys), width), dtype=np.uint32)
+    upper = np.zeros((len(keys), width), dtype=np.uint32)
+    for i, key in enumerate(keys):
+        neighbors = KEY_APPROX[key]
+        lower[i, :len(neighbors)] = [ord(c) for c in neighbors]
+        upper[i, :len(neighbors)] = [ord(c) for c in neighbors.upper()]
+    return rows, key_codes, counts, lower, upper
+
+
+def butter_finger_batch(
+    texts: Sequence[Sequence[str]],
+    prob: float = 0.1,
+    prob_token_pass: float = 0.1,
+    try_numbers: int = 1,
+    stop_words: Iterable[str] = (),
+    seed: Optional[int] = None,
+    indices: Optional[Iterable[int]] = None,
+    key: Tuple[int, ...] = (),
+) -> List[Sequence[str]]:
+    """
+    Batched version of `butter_finger`
+
+    As in `butter_finger` every try starts from the original tokens, so the
+    result has the distribution of a single try and only one is drawn.
+
+    Parameters
+    ----------
+    texts: List[List[str]]
+        tokenized texts to transform
+    indices: Iterable[int], optional
+        indices of the texts that key their random numbers, see `TextRandom`
+    key: Tuple[int, ...]
+        extra key of the random numbers, see `TextRandom`
+
+    The other parameters are the same as of `butter_finger`.
+
+    Returns
+    -------
+    List[List[str]]
+        transformed texts
+    """
+    import numpy as np
+
+    codes, token_lengths, text_lengths = _flatten(texts)
+    if not len(codes) or try_numbers < 1:
+        return [_copy_tokens(text) for text in texts]
+    rand = TextRandom(seed, indices, key)
+    rows, key_codes, counts, lower, upper = _keyboard_tables()
+
+    token_texts = np.repeat(np.arange(len(texts)), text_lengths)
+    passed = rand.uniform(token_texts, _positions(token_texts, len(texts)), 0) <= prob_token_pass
+    active = _active_tokens(texts, stop_words, passed)
+    char_texts = np.repeat(token_texts, token_lengths)
+    char_index = _positions(char_texts, len(texts))
+    in_table = codes < len(rows)
+    char_rows = np.where(in_table, rows[np.where(in_table, codes, 0)], -1)
+    changed = np.repeat(active, token_lengths) & (char_rows >= 0)
+    changed[changed] = rand.uniform(char_texts[changed], char_index[changed], 1) <= prob
+
+    changed_rows = char_rows[changed]
+    choice = rand.uniform(char_texts[changed], char_index[changed], 2) * counts[changed_rows]
+    choice = choice.astype(np.int64)
+    is_upper = codes[changed] != key_codes[changed_rows]
+    codes[changed] = np.where(is_upper, upper[changed_rows, choice], lower[changed_rows, choice])
+    return _unflatten(codes, token_lengths, text_lengths, _is_compact(texts))
+
+
+def _swap_char(c: str) -> str:
+    swapped = c.swapcase()
+    return swapped if len(swapped) == 1 else c
+
+
+def change_char_case_batch(
+    texts: Sequence[Sequence[str]],
+    prob: float = 0.1,
+    prob_token_pass: float = 0.1,
+    try_numbers: int = 1,
+    seed: Optional[int] = 42,
+    stop_words: Iterable[str] = (),
+    indices: Optional[Iterable[int]] = None,
+    key: Tuple[int, ...] = (),
+) -> List[Sequence[str]]:
+    """
+    Batched version of `change_char_case`
+
+    As in `change_char_case` the tokens are never passed and the characters
+    without case chosen for the change are dropped. The characters whose case
+    counterpart is several characters, e.g. "ß", keep their case.
+
+    Parameters
+    ----------
+    texts: List[List[str]]
+        tokenized texts to transform
+    indices: Iterable[int], optional
+        indices of the texts that key their random numbers, see `TextRandom`
+    key: Tuple[int, ...]
+        extra key of the random numbers, see `TextRandom`
+
+    The other parameters are the same as of `change_char_case`.
+
+    Returns
+    -------
+    List[List[str]]
+        transformed texts
+    """
+    import numpy as np
+
+    codes, token_lengths, text_lengths = _flatten(texts)
+    if not len(codes):
+        return [_copy_tokens(text) for text in texts]
+    rand = TextRandom(seed, indices, key)
+
+    token_texts = np.repeat(np.arange(len(texts)), text_lengths)
+    active = _active_tokens(texts, stop_words, np.zeros(len(token_texts), dtype=bool))
+    char_texts = np.repeat(token_texts, token_lengths)
+    char_index = _positions(char_texts, len(texts))
+    # a character changes its case back on every even try
+    chosen = np.zeros(len(codes), dtype=bool)
+    flipped = np.zeros(len(codes), dtype=bool)
+    for i in range(try_numbers):
+        hit = rand.uniform(char_texts, char_index, 1 + i) < prob
+        chosen |= hit
+        flipped ^= hit
+    active_chars = np.repeat(active, token_lengths)
+    chosen &= active_chars
+    uncased = [c for c in np.unique(codes[chosen]).tolist() if not (chr(c).isupper() or chr(c).islower())]
+    dropped = chosen & np.isin(codes, uncased)
+    flipped &= active_chars & ~dropped
+
+    joined = codes.tobytes().decode("utf-32-le")
+    swapped = joined.swapcase()
+    if len(swapped) != len(joined):
+        swapped = "".join(_swap_char(c) for c in joined)
+    swapped_codes = np.frombuffer(swapped.encode("utf-32-le"), dtype=np.uint32)
+    codes[flipped] = swapped_codes[flipped]
+    if dropped.any():
+        char_tokens = np.repeat(np.arange(len(token_lengths)), token_lengths)
+        token_lengths = token_lengths - np.bincount(char_tokens[dropped], minlength=len(token_lengths))
+        codes = codes[~dropped]
+    return _unflatten(codes, token_lengths, text_lengths, _is_compact(texts))
+
+
+def random_deletion_batch(
+    texts: Sequence[Sequence[str]],
+    prob: float = 0.1,
+    try_numbers: int = 1,
+    stop_words: Optional[Iterable[int]] = (),
+    seed: Optional[int] = None,
+    indices: Optional[Iterable[int]] = None,
+    key: Tuple[int, ...] = (),
+) -> List[Sequence[str]]:
+    """
+    Batched version of `random_deletion`
+
+    Parameters
+    ----------
+    texts: List[List[str]]
+        tokenized texts to transform
+    indices: Iterable[int], optional
+        indices of the texts that key their random numbers, see `TextRandom`
+    key: Tuple[int, ...]
+        extra key of the random numbers, see `TextRandom`
+
+    The other parameters are the same as of `random_deletion`.
+
+    Returns
+    -------
+    List[List[str]]
+        transformed texts
+    """
+    import numpy as np
+
+    rand = TextRandom(seed, indices, key)
+    stop_words = set(stop_words or ())
+    text_lengths = np.array(list(map(len, texts)), dtype=np.int64)
+    # the texts of one word are kept as is
+    text_ids = np.repeat(np.arange(len(texts)), np.where(text_lengths > 1, text_lengths, 0))
+    positions = _positions(text_ids, len(texts))
+    # the stop words are matched with the token indices, the words never match
+    stop_index = np.array(sorted(i for i in stop_words if isinstance(i, (int, np.integer))), dtype=np.int64)
+
+    for i in range(try_numbers):
+        keep = rand.uniform(text_ids, positions, i) > prob
+        if len(stop_index):
+            # the stop words are the indices in the text left after the previous try
+            keep |= np.isin(_positions(text_ids, len(texts)), stop_index)
+        text_ids, positions = text_ids[keep], positions[keep]
+
+    counts = np.bincount(text_ids, minlength=len(texts)).tolist()
+    bounds = [0] + np.cumsum(counts).tolist()
+    positions = positions.tolist()
+    no_texts = np.zeros(len(texts), dtype=np.int64)
+    last_word = rand.uniform(np.arange(len(texts)), no_texts, try_numbers).tolist()
+    stopword_pick = rand.uniform(np.arange(len(texts)), no_texts, try_numbers + 1).tolist()
+    result = []
+    for i, text in enumerate(texts):
+        if len(text) <= 1:
+            result.append(_copy_tokens(text))
+            continue
+        kept = positions[bounds[i]:bounds[i + 1]]
+        # if you end up deleting all words, just return a random word
+        if not kept:
+            kept = [int(last_word[i] * len(text))]
+        elif len(kept) == len(text):
+            stopwords = [
+                j for (j, word) in enumerate(text) if (word in _stopword_set() and j not in stop_words)
+            ]
+            if stopwords:
+                kept.pop(stopwords[int(stopword_pick[i] * len(stopwords))])
+        result.append(take_tokens(text, kept))
+    return result
+
+
+def random_swap_batch(
+    texts: Sequence[Sequence[str]],
+    try_numbers: int = 1,
+    stop_words: Optional[Iterable[str]] = (),
+    seed: Optional[int] = None,
+    indices: Optional[Iterable[int]] = None,
+    key: Tuple[int, ...] = (),
+) -> List[Sequence[str]]:
+    """
+    Batched version of `random_swap`
+
+    Parameters
+    ----------
+    texts: List[List[str]]
+        tokenized texts to transform
+    indices: Iterable[int], optional
+        indices of the texts that key their random numbers, see `TextRandom`
+    key: Tuple[int, ...]
+        extra key of the random numbers, see `TextRandom`
+
+    The other parameters are the same as of `random_swap`.
+
+    Returns
+    -------
+    List[List[str]]
+        transformed texts
+    """
+    import numpy as np
+
+    rand = TextRandom(seed, indices, key)
+    stop_words = set(stop_words or ())
+    picks = rand.uniform(
+        np.repeat(np.arange(len(texts)), 2 * try_numbers),
+        np.tile(np.arange(2 * try_numbers), len(texts)),
+        0,
+    ).reshape(len(texts), try_numbers, 2)
+    result = []
+    for i, words in enumerate(texts):
+        order = list(range(len(words)))
+        # a word is swapped at its first occurrence as in random_swap
+        first = {}
+        allowed = [first.setdefault(word, j) for j, word in enumerate(words) if word not in stop_words]
+        if len(allowed) > 1:
+            for a, b in (picks[i] * len(allowed)).astype(np.int64).tolist():
+                idx_1, idx_2 = allowed[a], allowed[b]
+                order[idx_1], order[idx_2] = order[idx_2], order[idx_1]
+        result.append(take_tokens(words, order))
+    return result
@@ -0,0 +1,118 @@
+"""Execution backends of the fabric.
+
+The chunks of texts can be processed in the main process ("serial"), in a
+pool of threads ("thread") or in a pool of processes ("process" with the
+default start method of the platform, or "fork", "forkserver", "spawn").
+Every thread or process builds its own conveyer, so the units like Mystem
+aren't shared between the workers.
+
+The threads suit the conveyers that wait on IO, e.g. on the Mystem
+subprocess, and the free-threaded Python builds where the threads run the
+python code in parallel. The processes suit the CPU-bound conveyers like the
+regexes on the builds with the GIL. The "auto" backend chooses by timing a
+sample of the texts.
+"""
+import math
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing.pool import Pool, ThreadPool
+from typing import Callable, Optional, Tuple
+
+PROCESS_BACKENDS = ("process", "fork", "forkserver", "spawn")
+BACKENDS = ("serial", "thread") + PROCESS_BACKENDS + ("auto",)
+
+# The conveyers that are expected to run less than this amount of seconds
+# serially don't pay off the start of the workers.
+MIN_PARALLEL_TIME = 0.5
+# The amount of seconds of work that is worth an extra worker.
+MIN_WORKER_TIME = 0.25
+# The conveyers that spend less than this share of the time on the CPU of
+# the main process are waiting on IO, so the threads are enough for them.
+IO_BOUND_CPU_SHARE = 0.5
+# The maximal amount of texts timed by the "auto" backend.
+CALIBRATION_SAMPLE_SIZE = 256
+
+
+def gil_enabled() -> bool:
+    """Whether the interpreter runs with the GIL, False for the free-threaded builds."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is None or is_gil_enabled()
+
+
+def cpu_count() -> int:
+    """Amount of CPUs available to the process."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def check_backend(backend: str) -> None:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend}, expected one of {BACKENDS}")
+
+
+def create_pool(backend: str, pool_size: int, initializer: Callable, initargs: tuple) -> Pool:
+    """Create the pool of threads or processes for the backend."""
+    if backend == "thread":
+        return ThreadPool(pool_size, initializer=initializer, initargs=initargs)
+    if backend not in PROCESS_BACKENDS:
+        raise ValueError(f"The backend {backend} has no pool of workers")
+    start_method = None if backend == "process" else backend
+    return multiprocessing.get_context(start_method).Pool(pool_size, initializer=initializer, initargs=initargs)
+
+
+def calibration_sample_size(n_texts: int) -> int:
+    """Amount of texts to time, a small part of the corpus."""
+    return min(CALIBRATION_SAMPLE_SIZE, max(1, n_texts // 8))
+
+
+class Calibration:
+    """Timing of the conveyer on a sample of texts.
+
+    Args:
+        seconds_per_text (float): wall time of processing a text.
+        cpu_share (float): share of the wall time spent on the CPU of the
+            main process. It is low when the conveyer waits on a subprocess.
+    """
+
+    def __init__(self, seconds_per_text: float, cpu_share: float) -> None:
+        self.seconds_per_text = seconds_per_text
+        self.cpu_share = cpu_share
+
+    @classmethod
+    def measure(cls, run: Callable[[], list], n_texts: int) -> Tuple["Calibration", list]:
+        """Time the serial run over `n_texts` texts and return its result too."""
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        result = run()
+        cpu_time = time.process_time() - cpu_start
+        wall_time = time.perf_counter() - wall_start
+        cpu_share = cpu_time / wall_time if wall_time > 0 else 1.0
+        return cls(wall_time / max(n_texts, 1), cpu_share), result
+
+    def choose(self, n_texts: Optional[int], max_workers: Optional[int] = None) -> Tuple[str, Optional[int]]:
+        """Choose the backend and the amount of workers for the texts.
+
+        Args:
+            n_texts (int, optional): amount of texts to process, None if it
+                is unknown, e.g. for a stream.
+            max_workers (int, optional): maximal amount of workers, the amount
+                of CPUs by default.
+
+        Returns:
+            Tuple[str, Optional[int]]: the backend and the pool size.
+        """
+        max_workers = max_workers or cpu_count()
+        total_time = math.inf if n_texts is None else self.seconds_per_text * n_texts
+        if max_workers < 2 or total_time < MIN_PARALLEL_TIME:
+            return "serial", None
+        pool_size = max_workers if math.isinf(total_time) else int(total_time / MIN_WORKER_TIME)
+        pool_size = min(max_workers, max(2, pool_size))
+        if self.cpu_share < IO_BOUND_CPU_SHARE or not gil_enabled():
+            return "thread", pool_size
+        return "process", pool_size
+
+    def __repr__(self) -> str:
+        return f"Calibration(seconds_per_text={self.seconds_per_text:.3g}, cpu_share={self.cpu_share:.2f})"
@@ -1,14 +1,56 @@
-from typing import Dict, Any, Union, List
+from typing import TYPE_CHECKING, Dict, Any, Union, List, Sequence, Tuple
 from abc import abstractmethod, ABCMeta
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def is_text_series(series: "pd.Series") -> bool:
+    """Check that all values of the series are strings, so `.str` methods apply."""
+    from pandas.api.types import infer_dtype
+
+    return infer_dtype(series, skipna=False) in ("string", "empty")
+
 
 class ProcessUnit(metaclass=ABCMeta):
     """Allow processing without object modification."""
 
+    # The unit gives different results for the same text, e.g. augmentation.
+    stochastic = False
+
     @abstractmethod
     def process(self, text: str) -> str:
         pass
 
+    def process_batch(self, texts: List[str]) -> List[str]:
+        """Process a batch of texts.
+
+        By default the texts are processed one by one. Override it when
+        the unit can amortize its setup over the whole batch.
+        """
+        return [self.process(text) for text in texts]
+
+    def process_indexed_batch(self, texts: List[str], indices: Sequence[int], key: Tuple[int, ...]) -> List[str]:
+        """Process a batch of texts knowing their place in the corpus.
+
+        The fabric calls it with the indices of the texts (not always
+        consecutive) and the key of the unit run, e.g. its position in the
+        conveyer. The stochastic units use them to seed every text, so the
+        result doesn't depend on how the texts are split into batches. By
+        default it is `process_batch`.
+        """
+        return self.process_batch(texts)
+
+    def process_series(self, series: "pd.Series") -> "pd.Series":
+        """Process a pandas Series of texts keeping its index.
+
+        By default the texts go through `process_batch`. Override it when
+        the unit has a vectorized equivalent among the `.str` methods.
+        """
+        import pandas as pd
+
+        return pd.Series(self.process_batch(series.to_list()), index=series.index, name=series.name, dtype=object)
+
     @classmethod
     def __str__(self):
         pass
@@ -0,0 +1,169 @@
+"""Cache of the processed texts.
+
+The key of a text is the hash of the conveyer fingerprint and the text
+itself, so one cache can be shared by the fabrics with different configs.
+The processed texts are kept in memory with LRU eviction and optionally in
+a SQLite database that persists between the runs.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from array import array
+from typing import Any, Dict, List, Optional
+
+from .tokens import OFFSET_TYPE, TokenizedText
+
+# The key of the JSON object that stores a `TokenizedText`.
+_TOKENIZED_TEXT_KEY = "__tokenized_text__"
+
+
+def _to_json(obj: Any) -> Any:
+    """The objects with `tolist`, e.g. `TokenizedText`, are hashed as lists."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return repr(obj)
+
+
+def _encode(obj: Any) -> Any:
+    """Store `TokenizedText` with its offsets, so it is loaded as is."""
+    if isinstance(obj, TokenizedText):
+        return {_TOKENIZED_TEXT_KEY: [obj.text, obj.starts.tolist(), obj.ends.tolist()]}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and _TOKENIZED_TEXT_KEY in obj:
+        text, starts, ends = obj[_TOKENIZED_TEXT_KEY]
+        return TokenizedText(text, array(OFFSET_TYPE, starts), array(OFFSET_TYPE, ends))
+    return obj
+
+
+def cache_key(fingerprint: str, text: Any) -> str:
+    """Hash the text together with the fingerprint of the conveyer."""
+    if isinstance(text, str):
+        payload = "s:" + text
+    else:
+        payload = "j:" + json.dumps(text, ensure_ascii=False, default=_to_json)
+    return hashlib.sha256((fingerprint + "\0" + payload).encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """In-memory cache that drops the least recently used entries.
+
+    Args:
+        maxsize (int): maximal amount of entries.
+    """
+
+    def __init__(self, maxsize: int = 100000) -> None:
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+        return found
+
+    def set_many(self, items: Dict[str, Any]) -> None:
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SqliteCache:
+    """On-disk cache in a SQLite database.
+
+    The values are stored as JSON, so the tuples come back as lists. The
+    `TokenizedText` values are stored with their offsets and come back as is.
+    The values that can't be stored as JSON, e.g. the custom objects, are
+    skipped.
+
+    Args:
+        path (str): path to the database file.
+    """
+
+    # SQLite limits the amount of the query parameters.
+    _max_params = 900
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), self._max_params):
+                part = keys[i:i + self._max_params]
+                rows = self._conn.execute(
+                    "SELECT key, value FROM results WHERE key IN (%s)" % ",".join("?" * len(part)),
+                    part,
+                )
+                for key, value in rows:
+                    found[key] = json.loads(value, object_hook=_decode)
+        return found
+
+    def set_many(self, items: Dict[str, Any]) -> None:
+        if not items:
+            return
+        rows = []
+        for key, value in items.items():
+            try:
+                rows.append((key, json.dumps(value, ensure_ascii=False, default=_encode)))
+            except (TypeError, ValueError):
+                continue
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?)", rows)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class TextCache:
+    """In-memory LRU cache backed by an optional SQLite database.
+
+    The values that can't be stored in the database are kept only in memory.
+
+    Args:
+        maxsize (int): maximal amount of entries kept in memory.
+        path (str, optional): path to the database file.
+    """
+
+    def __init__(self, maxsize: int = 100000, path: Optional[str] = None) -> None:
+        self.memory = LRUCache(maxsize)
+        self.disk = SqliteCache(path) if path is not None else None
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        found = self.memory.get_many(keys)
+        if self.disk is not None and len(found) < len(keys):
+            from_disk = self.disk.get_many([key for key in keys if key not in found])
+            self.memory.set_many(from_disk)
+            found.update(from_disk)
+        return found
+
+    def set_many(self, items: Dict[str, Any]) -> None:
+        self.memory.set_many(items)
+        if self.disk is not None:
+            self.disk.set_many(items)
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
@@ -0,0 +1,209 @@
+"""Command line batch processor.
+
+Streams the records of a file through the fabric built from the config and
+writes them back in the same format:
+
+    textfab config.yaml comments.jsonl processed.jsonl --field text --pool-size 4
+
+Supported formats are JSONL, CSV, TSV, plain text (one text per line, the
+line breaks of the results are written as \\n and \\r, the input lines are
+read as is) and Parquet (requires pyarrow). The format is defined by the
+file extension or by the `--format` option.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from itertools import tee
+from typing import Any, Iterator, List, Optional
+
+from .backends import BACKENDS
+from .fabric import Fabric
+from .tokens import to_builtin
+
+FORMATS = {".jsonl": "jsonl", ".csv": "csv", ".tsv": "tsv", ".txt": "txt", ".parquet": "parquet"}
+DELIMITERS = {"csv": ",", "tsv": "\t"}
+
+
+class RecordError(ValueError):
+    """The input file doesn't match the format or the text field."""
+
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise RecordError(f"Can't detect the format of {path}, use --format option")
+    return FORMATS[ext]
+
+
+def to_text(value: Any) -> str:
+    """Represent the processed value as a string, e.g. the list of tokens."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=to_builtin)
+
+
+# The escapes of the line breaks in the plain text output, one text per line.
+# The backslashes are not escaped, so a rerun on the output keeps it as is.
+TXT_ESCAPES = str.maketrans({"\n": "\\n", "\r": "\\r"})
+
+
+class RecordReader:
+    """Read the records lazily and pick the text field from them."""
+
+    def __init__(self, f, fmt: str, field: str) -> None:
+        self.fmt = fmt
+        self.field = field
+        self.fieldnames = None
+        if fmt in DELIMITERS:
+            self.reader = csv.DictReader(f, delimiter=DELIMITERS[fmt])
+            self.fieldnames = self.reader.fieldnames
+            if self.fieldnames is None or field not in self.fieldnames:
+                raise RecordError(f"The column {field} is not found")
+        else:
+            self.reader = f
+
+    def __iter__(self) -> Iterator[Any]:
+        for record in self.reader:
+            if self.fmt == "jsonl":
+                if not record.strip():
+                    continue
+                record = json.loads(record)
+            elif self.fmt == "txt":
+                record = record.rstrip("\n")
+            yield record
+
+    def get_text(self, record: Any, number: int) -> str:
+        """The text of the record.
+
+        Args:
+            record (Any): the record.
+            number (int): number of the record in the file from 1, for the errors.
+        """
+        if self.fmt == "txt":
+            return record
+        if self.fmt == "jsonl" and not (isinstance(record, dict) and self.field in record):
+            raise RecordError(f"The record {number} has no field {self.field}")
+        if self.fmt in DELIMITERS and record.get(self.field) is None:
+            raise RecordError(f"The record {number} has no column {self.field}")
+        return record[self.field]
+
+
+class RecordWriter:
+    """Write the records putting the processed text in the output field."""
+
+    def __init__(self, f, fmt: str, field: str, fieldnames: Optional[List[str]]) -> None:
+        self.f = f
+        self.fmt = fmt
+        self.field = field
+        if fmt in DELIMITERS:
+            if field not in fieldnames:
+                fieldnames = fieldnames + [field]
+            self.writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=DELIMITERS[fmt])
+            self.writer.writeheader()
+
+    def write(self, record: Any, processed: Any) -> None:
+        if self.fmt == "txt":
+            # the line breaks are escaped, so the output lines match the input ones
+            self.f.write(to_text(processed).translate(TXT_ESCAPES) + "\n")
+        elif self.fmt == "jsonl":
+            record[self.field] = processed
+            self.f.write(json.dumps(record, ensure_ascii=False, default=to_builtin) + "\n")
+        else:
+            record[self.field] = to_text(processed)
+            self.writer.writerow(record)
+
+
+def _open(path: str, mode: str, fmt: str):
+    if path == "-":
+        return sys.stdin if mode == "r" else sys.stdout
+    # The csv module handles the line endings itself.
+    newline = "" if fmt in DELIMITERS else None
+    return open(path, mode, encoding="utf-8", newline=newline)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="textfab",
+        description="Process the texts of a file with the fabric built from the config.",
+    )
+    parser.add_argument("config", help="path to the fabric YAML config")
+    parser.add_argument("input", help="input file path, '-' for stdin")
+    parser.add_argument("output", help="output file path, '-' for stdout")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())),
+                        help="format of the input and output files (default: by extension)")
+    parser.add_argument("--field", default="text",
+                        help="field or column with the text (default: text)")
+    parser.add_argument("--output-field",
+                        help="field or column for the result (default: the text field)")
+    parser.add_argument("--pool-size", type=int, default=None,
+                        help="amount of workers (default: single process, all CPUs with --backend)")
+    parser.add_argument("--backend", choices=BACKENDS, default=None,
+                        help="run the workers in threads or processes, 'auto' chooses by "
+                             "timing the first chunk (default: processes if --pool-size is set)")
+    parser.add_argument("--chunksize", type=int, default=1000,
+                        help="amount of texts sent to the workers at once, the record "
+                             "batch size for Parquet (default: 1000)")
+    parser.add_argument("--no-integrity", action="store_true",
+                        help="don't check the amount integrity")
+    return parser
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    return build_parser().parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if "-" not in (args.input, args.output) and os.path.realpath(args.input) == os.path.realpath(args.output):
+        parser.error("the output file is the input one, it would be truncated before reading")
+    try:
+        _run(args)
+    except RecordError as e:
+        parser.error(str(e))
+
+
+def _run(args: argparse.Namespace) -> None:
+    fmt = args.format
+    if fmt is None:
+        fmt = detect_format(args.input if args.input != "-" else args.output)
+    fab = Fabric.load_from_config(args.config)
+    if fmt == "parquet":
+        if "-" in (args.input, args.output):
+            raise RecordError("Parquet can't be read from stdin or written to stdout")
+        fab.process_parquet(
+            args.input,
+            args.output,
+            args.field,
+            args.output_field,
+            batch_size=args.chunksize,
+            pool_size=args.pool_size,
+            backend=args.backend,
+        )
+        return
+    fin = _open(args.input, "r", fmt)
+    fout = _open(args.output, "w", fmt)
+    try:
+        reader = RecordReader(fin, fmt, args.field)
+        writer = RecordWriter(fout, fmt, args.output_field or args.field, reader.fieldnames)
+        records, source_records = tee(reader)
+        processed = fab.stream(
+            (reader.get_text(r, i) for i, r in enumerate(source_records, 1)),
+            pool_size=args.pool_size,
+            chunksize=args.chunksize,
+            backend=args.backend,
+            ensure_amount_integrity=not args.no_integrity,
+        )
+        for text, record in zip(processed, records):
+            writer.write(record, text)
+    finally:
+        if fin is not sys.stdin:
+            fin.close()
+        if fout is not sys.stdout:
+            fout.close()
+
+
+if __name__ == "__main__":
+    main()
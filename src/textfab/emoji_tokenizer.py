@@ -5,6 +5,8 @@
 import re
 from typing import List
 
+from .tokens import TokenizedText
+
 # Basic patterns.
 RE_NUM = r"[0-9]+"
 RE_WORD = r"[a-zA-Zа-яА-Я]+"
@@ -24,8 +26,11 @@ TITLES = [
     r"Dr\.",
     r"Prof\.",
 ]
-# Ensure case insensitivity
-RE_TITLES = r"|".join([r"(?i)" + t for t in TITLES])
+# The titles were marked case insensitive with the inline "(?i)" flags. Out of
+# the start of the pattern such flags applied to the whole pattern, and they
+# are an error since Python 3.11, so the whole pattern is compiled with
+# re.IGNORECASE instead.
+RE_TITLES = r"|".join(TITLES)
 
 # Symbols have to be created as separate patterns in order to match consecutive
 # identical symbols.
@@ -89,21 +94,31 @@ EMOTICONS_EXTRA = [
     r"(;",
 ]
 
+# Every combination of the start, the optional middle and the repeated end.
+# The middle and the end symbols don't intersect, so the combinations collapse
+# into one pattern with the same matches instead of an alternation of all of
+# them that is tried at every token.
 RE_EMOTICON = r"|".join([re.escape(s) for s in EMOTICONS_EXTRA])
-for s in EMOTICONS_START:
-    for m in EMOTICONS_MID:
-        for e in EMOTICONS_END:
-            RE_EMOTICON += "|{0}{1}?{2}+".format(
-                re.escape(s), re.escape(m), re.escape(e)
-            )
+RE_EMOTICON += "|(?:{0})[{1}]?(?:{2})".format(
+    r"|".join([re.escape(s) for s in EMOTICONS_START]),
+    r"".join([re.escape(m) for m in EMOTICONS_MID]),
+    r"|".join([re.escape(e) + r"+" for e in EMOTICONS_END]),
+)
 
 # requires ucs4 in python2.7 or python3+
 # RE_EMOJI = r"""[\U0001F300-\U0001F64F\U0001F680-\U0001F6FF\u2600-\u26FF\u2700-\u27BF]"""
 # safe for all python
 RE_EMOJI = r"""\ud83c[\udf00-\udfff]|\ud83d[\udc00-\ude4f\ude80-\udeff]|[\u2600-\u26FF\u2700-\u27BF]"""
 
+# A shortcut for the most common token, a word that none of the patterns
+# above RE_WORD can match: it isn't followed by a symbol that continues a
+# URL, an email, a combined word, a contraction, a title, an abbreviation or
+# an emoticon. The other words fall through to the full list of patterns.
+RE_PLAIN_WORD = fr"{RE_WORD}(?![-_'.:+@0-9a-zA-Zа-яА-Я])"
+
 # List of matched token patterns, ordered from most specific to least specific.
 TOKENS = [
+    RE_PLAIN_WORD,
     RE_URL,
     RE_EMAIL,
     RE_COMB,
@@ -126,7 +141,7 @@ IGNORED = [RE_WHITESPACE]
 
 # Final pattern
 RE_PATTERN = re.compile(
-    r"|".join(IGNORED) + r"|(" + r"|".join(TOKENS) + r")", re.UNICODE
+    r"|".join(IGNORED) + r"|(" + r"|".join(TOKENS) + r")", re.UNICODE | re.IGNORECASE
 )
 
 
@@ -147,8 +162,16 @@ def tokenize(text: str) -> List[str]:
     # Returns:
         List of strings (tokens).
     """
-    result = RE_PATTERN.findall(text)
+    # The ignored whitespace gives the empty strings, no token starts with a
+    # whitespace.
+    return list(filter(None, RE_PATTERN.findall(text)))
+
 
-    # Remove empty strings
-    result = [t for t in result if t.strip()]
-    return result
+def tokenize_offsets(text: str) -> TokenizedText:
+    """Same tokens as `tokenize` kept as the offsets in the text.
+    # Arguments:
+        text: Input string to be tokenized.
+    # Returns:
+        TokenizedText.
+    """
+    return TokenizedText.from_spans(text, (m.span(1) for m in RE_PATTERN.finditer(text) if m.start(1) >= 0))
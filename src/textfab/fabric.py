@@ -1,26 +1,274 @@
 from . import units
 from .base import ProcessUnit, ParamChangingProcessUnit, ParamProcessUnit
+from .fusion import plan_conveyer
+from .cache import TextCache, cache_key
+from .profiling import FabricProfile, batch_size
+from .transport import TRANSPORTS, SharedTexts
+from .tokens import TokenizedText
+from .backends import PROCESS_BACKENDS, Calibration, calibration_sample_size, check_backend, cpu_count, create_pool
+from collections import deque
+from itertools import chain, islice
 from multiprocessing import Pool
-from omegaconf.dictconfig import DictConfig
-from omegaconf.listconfig import ListConfig
-from omegaconf import OmegaConf
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, List, Optional, Sequence
+import copy
+import hashlib
+import json
+import queue
+import sys
+import threading
+import time
 import importlib
-import pandas as pd
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+    from .serving import MicroBatcher
+
+
+def _is_instance(obj: Any, module_name: str, type_name: str) -> bool:
+    """Check the type without importing its module.
+
+    If the module isn't imported yet, the object can't be of its type, so
+    pandas and omegaconf are not imported just to check the input.
+    """
+    module = sys.modules.get(module_name)
+    return module is not None and isinstance(obj, getattr(module, type_name))
+
+
+def _to_container(obj: Any) -> Any:
+    """Convert OmegaConf objects inside the config to the plain ones."""
+    if _is_instance(obj, "omegaconf", "Container"):
+        from omegaconf import OmegaConf
+
+        return OmegaConf.to_container(obj)
+    if isinstance(obj, dict):
+        return {k: _to_container(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_to_container(v) for v in obj]
+    return obj
+
+# The fabric that a pool worker builds once in its initializer and reuses
+# for every task it receives. It is kept per thread, so every worker of the
+# thread backend has its own conveyer too.
+_worker = threading.local()
+
+
+def _init_worker(config: list, options: dict):
+    _worker.fabric = Fabric(config, **options)
+
+
+def _process_in_worker(texts: "list | SharedTexts", indices: Sequence[int], n_variants: Optional[int] = None):
+    if not isinstance(texts, SharedTexts):
+        return _worker.fabric._process_chunk(texts, indices, n_variants)
+    # the texts came through the shared memory, the result goes back the same way
+    processed_texts, profile = _worker.fabric._process_chunk(texts.unpack(), indices, n_variants)
+    shared_texts = SharedTexts.pack(processed_texts)
+    return (processed_texts if shared_texts is None else shared_texts), profile
+
+
+def _split_batches(texts: list, n_batches: int) -> list:
+    size, extra = divmod(len(texts), n_batches)
+    if extra:
+        size += 1
+    size = max(size, 1)
+    return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+
+# The cost of a text besides its characters, e.g. the per-text calls of the units.
+TEXT_OVERHEAD_COST = 32
+
+
+def _text_cost(text: Any) -> int:
+    """Estimated cost of processing the text: its characters and a fixed overhead."""
+    if isinstance(text, str):
+        return len(text) + TEXT_OVERHEAD_COST
+    if isinstance(text, TokenizedText):
+        return len(text.text) + TEXT_OVERHEAD_COST
+    if isinstance(text, (list, tuple)):
+        return sum(len(token) for token in text if isinstance(token, str)) + TEXT_OVERHEAD_COST
+    return TEXT_OVERHEAD_COST
+
+
+def _split_by_cost(costs: Sequence[float], n_workers: int) -> List[List[int]]:
+    """Group the indices of the texts into the chunks of similar cost, the costliest first.
+
+    The texts are sorted by cost, so the long ones are dispatched first and
+    the short ones fill the gaps at the end. Every chunk takes half of the
+    remaining cost per worker, so the chunks get smaller towards the end, but
+    not smaller than 1/16 of the cost per worker.
+    """
+    order = sorted(range(len(costs)), key=costs.__getitem__, reverse=True)
+    remaining = sum(costs)
+    min_chunk_cost = remaining / (n_workers * 16)
+    chunks = []
+    chunk = []
+    chunk_cost = 0
+    for i in order:
+        chunk.append(i)
+        chunk_cost += costs[i]
+        if chunk_cost >= max(remaining / (n_workers * 2), min_chunk_cost):
+            chunks.append(chunk)
+            remaining -= chunk_cost
+            chunk = []
+            chunk_cost = 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _deduplicate(texts: list) -> tuple:
+    """Find the unique texts and the position of every text among them.
+
+    Only the strings are compared, the other objects are treated as unique.
+    """
+    index = {}
+    unique_texts = []
+    positions = []
+    for text in texts:
+        key = text if isinstance(text, str) else object()
+        if key not in index:
+            index[key] = len(unique_texts)
+            unique_texts.append(text)
+        positions.append(index[key])
+    return unique_texts, positions
+
+
+def _copy_result(text: Any) -> Any:
+    """Copy the mutable result, e.g. the token list, the strings are immutable."""
+    return text if isinstance(text, (str, TokenizedText)) else copy.deepcopy(text)
+
+
+def _scatter(processed_texts: list, positions: list) -> list:
+    """Put the processed unique texts back to the positions of `_deduplicate`.
+
+    The repeated results that are not strings, e.g. the token lists, are
+    copied, so changing one of them doesn't change the others.
+    """
+    seen = set()
+    result = []
+    for i in positions:
+        text = processed_texts[i]
+        if i in seen:
+            text = _copy_result(text)
+        seen.add(i)
+        result.append(text)
+    return result
+
+
+def _with_offsets(chunks: Iterable[list], start: int = 0) -> Iterator[tuple]:
+    """Pair every chunk with the index of its first text."""
+    for chunk in chunks:
+        yield start, chunk
+        start += len(chunk)
+
+
+def _iter_chunks(texts: Iterable, chunksize: int) -> Iterator[list]:
+    texts = iter(texts)
+    chunk = list(islice(texts, chunksize))
+    while chunk:
+        yield chunk
+        chunk = list(islice(texts, chunksize))
+
+
+def _imap_bounded(pool: Pool, jobs: Iterable[tuple], window: int, ordered: bool) -> Iterator[tuple]:
+    """Like `Pool.imap`, but reads no more than `window` jobs ahead.
+
+    The job is a pair of the metadata that stays in the main process and the
+    arguments of `_process_in_worker` sent to the workers. The metadata is
+    yielded back together with the processed chunk.
+    """
+    if ordered:
+        pending = deque()
+        for meta, args in jobs:
+            pending.append((meta, pool.apply_async(_process_in_worker, args)))
+            if len(pending) >= window:
+                meta, result = pending.popleft()
+                yield meta, result.get()
+        while pending:
+            meta, result = pending.popleft()
+            yield meta, result.get()
+        return
+
+    done = queue.Queue()
+
+    def get_done():
+        result = done.get()
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    in_flight = 0
+    for meta, args in jobs:
+        pool.apply_async(
+            _process_in_worker,
+            args,
+            callback=lambda result, meta=meta: done.put((meta, result)),
+            error_callback=done.put,
+        )
+        in_flight += 1
+        if in_flight >= window:
+            yield get_done()
+            in_flight -= 1
+    while in_flight:
+        yield get_done()
+        in_flight -= 1
+
 
 class Fabric:
-    def __init__(self, config: list):
+    def __init__(
+        self,
+        config: list,
+        fuse_units: bool = True,
+        cache: Optional[TextCache] = None,
+        profile: bool = False,
+        transport: str = "pickle",
+    ):
+        """
+        Args:
+            config (list): sequence of units.
+            fuse_units (bool): merge the consecutive units that can be run
+                in one pass, e.g. regex substitutions. The result is the same
+                as running the units one after another.
+            cache (TextCache, optional): cache of the processed texts. The
+                texts found in it skip the conveyer. It isn't used if the
+                conveyer has stochastic units, e.g. augmentations.
+            profile (bool): collect the stats of every unit in `profile`
+                attribute. The units are not fused in this mode, so the stats
+                are collected for every unit of the conveyer.
+            transport (str): how the chunks of texts are sent to the worker
+                processes and back. "pickle" pickles every text. With
+                "shared_memory" the chunk of strings is packed into one block
+                of shared memory as the UTF-8 bytes and the offsets, so the
+                texts aren't pickled and copied through the pipe. The chunks
+                with other objects, e.g. the tokens, are pickled anyway.
+        """
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport {transport}, expected one of {TRANSPORTS}")
         self.conveyer = []
-        if not (isinstance(config, list) or isinstance(config, ListConfig)):
+        self.fuse_units = fuse_units
+        self.cache = cache
+        self.transport = transport
+        self.profile = None
+        self._profile_hooks = []
+        self._plan = None
+        self._plan_key = None
+        self._pool = None
+        self._pool_size = None
+        self._pool_backend = None
+        self._batcher = None
+        self.last_backend = None
+        if not (isinstance(config, list) or _is_instance(config, "omegaconf", "ListConfig")):
             raise ValueError("The config is not a list")
         for u in config:
             if isinstance(u, str):
                 if "." in u:
                     path = u.split(".")
                     u = getattr(importlib.import_module(".".join(path[:-1])), path[-1])
-                    self.conveyer.append(u())
+                    self.conveyer.append(self._new_unit(u))
                 else:
-                    self.conveyer.append(getattr(units, u)())
-            elif isinstance(u, dict) or isinstance(u, DictConfig):
+                    self.conveyer.append(self._new_unit(units.get_unit(u)))
+            elif isinstance(u, dict) or _is_instance(u, "omegaconf", "DictConfig"):
                 unit_name = list(u.keys())[0]
                 arguments = list(u.values())[0]
                 if "." in unit_name:
@@ -28,60 +276,776 @@ class Fabric:
                     unit_name = getattr(importlib.import_module(".".join(path[:-1])), path[-1])
                     self.conveyer.append(unit_name(arguments))
                 else:
-                    self.conveyer.append(getattr(units, unit_name)(arguments))
+                    self.conveyer.append(units.get_unit(unit_name)(arguments))
             elif isinstance(u, ProcessUnit):
                 self.conveyer.append(u)
             else:
                 raise ValueError("Unknown type of unit")
+        if profile:
+            self.reset_profile()
 
+    def _stages(self) -> list:
+        """Units that are actually run, rebuilt when the conveyer changes."""
+        if not self.fuse_units:
+            return self.conveyer
+        plan_key = tuple(id(u) for u in self.conveyer)
+        if self._plan_key != plan_key:
+            self._plan = plan_conveyer(self.conveyer)
+            self._plan_key = plan_key
+        return self._plan
 
     def _process(self, text: str):
-        for u in self.conveyer:
+        for u in self._stages():
             text = u.process(text)
         return text
 
-    def __call__(self, texts: str | list | pd.Series, ensure_amount_integrity=True, pool_size=None):
-        if isinstance(texts, str):
-            texts = [texts]
-        elif isinstance(texts, pd.Series):
-            texts = texts.to_list()
+    def _run_stages(
+        self, stages: list, texts: list, indices: Optional[Sequence[int]] = None, variant: int = 0
+    ) -> list:
+        """Pass the texts with the `indices` in the corpus through the stages.
+
+        The key of a unit is its position in the conveyer and the variant of
+        the augmentation if it isn't the first one.
+        """
+        if indices is None:
+            indices = range(len(texts))
+        positions = {id(u): i for i, u in enumerate(self.conveyer)}
+        for u in stages:
+            key = (positions.get(id(u), -1),) + ((variant,) if variant else ())
+            texts = u.process_indexed_batch(texts, indices, key)
+        return texts
+
+    def _process_batch(self, texts: list, indices: Optional[Sequence[int]] = None) -> list:
+        return self._run_stages(self._stages(), texts, indices)
+
+    def _augment_batch(self, texts: list, indices: Optional[Sequence[int]], n_variants: int) -> list:
+        """Run the stages before the first stochastic unit once and the rest for every variant."""
+        stages = list(self._stages())
+        split = next((i for i, u in enumerate(stages) if u.stochastic), len(stages))
+        texts = self._run_stages(stages[:split], texts, indices)
+        variants = [self._run_stages(stages[split:], texts, indices, variant) for variant in range(n_variants)]
+        if any(len(v) != len(texts) for v in variants):
+            raise ValueError(
+                "Text amount integrity  violated: the variants can't be matched with the source texts."
+            )
+        return [list(text_variants) for text_variants in zip(*variants)]
+
+    def _process_chunk(
+        self, texts: list, indices: Optional[Sequence[int]] = None, n_variants: Optional[int] = None
+    ) -> tuple:
+        """Process the chunk and collect the stats if the profiling is on."""
+        if n_variants is not None:
+            return self._augment_batch(texts, indices, n_variants), None
+        if self.profile is None:
+            return self._process_batch(texts, indices), None
+        if indices is None:
+            indices = range(len(texts))
+        profile = FabricProfile([str(u) for u in self.conveyer])
+        for position, (u, stats) in enumerate(zip(self.conveyer, profile.units)):
+            size_in = batch_size(texts)
+            start_time = time.perf_counter()
+            processed_texts = u.process_indexed_batch(texts, indices, (position,))
+            duration = time.perf_counter() - start_time
+            stats.record(duration, len(texts), size_in, batch_size(processed_texts))
+            texts = processed_texts
+        return texts, profile
+
+    def reset_profile(self):
+        """Start collecting the stats of the units from scratch."""
+        self.profile = FabricProfile([str(u) for u in self.conveyer])
+
+    def add_profile_hook(self, hook: Callable[[FabricProfile], None]):
+        """Register a callback called with the stats of every processed chunk.
+
+        The callback is called in the main process, also for the chunks
+        processed by the workers, so it can forward the stats to the metrics.
+
+        Args:
+            hook (Callable[[FabricProfile], None]): callback.
+        """
+        self._profile_hooks.append(hook)
+
+    def fingerprint(self) -> str:
+        """Stable hash of the conveyer built from the units and their params."""
+        conf_list = _to_container([self._unit_config(u) for u in self.conveyer])
+        return hashlib.sha256(
+            json.dumps(conf_list, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+    def _is_stochastic(self) -> bool:
+        return any(u.stochastic for u in self.conveyer)
+
+    def _cache_fingerprint(self) -> Optional[str]:
+        if self.cache is None or self._is_stochastic():
+            return None
+        return self.fingerprint()
+
+    def _prepare_chunk(self, indices: Sequence[int], chunk: list, fingerprint: Optional[str]) -> tuple:
+        """Split the chunk into the metadata and the arguments of the processing."""
+        if fingerprint is None:
+            return None, (chunk, indices)
+        keys = [cache_key(fingerprint, text) for text in chunk]
+        cached = self.cache.get_many(keys)
+        todo = [text for text, key in zip(chunk, keys) if key not in cached]
+        todo_indices = [i for i, key in zip(indices, keys) if key not in cached]
+        return (keys, cached), (todo, todo_indices)
+
+    def _finish_chunk(self, meta: Optional[tuple], processed_texts: list) -> list:
+        """Assemble the processed chunk back from the metadata."""
+        if meta is None:
+            return processed_texts
+        keys, cached = meta
+        if len(processed_texts) != sum(key not in cached for key in keys):
+            raise ValueError(
+                "Text amount integrity  violated: the cached fabric can't match the processed texts with the source ones."
+            )
+        processed_texts = iter(processed_texts)
+        result = []
+        new_items = {}
+        # the cache keeps its own copies, so changing the result doesn't change it
+        for key in keys:
+            if key in cached:
+                result.append(_copy_result(cached[key]))
+            else:
+                processed_text = next(processed_texts)
+                new_items[key] = _copy_result(processed_text)
+                result.append(processed_text)
+        self.cache.set_many(new_items)
+        return result
+
+    def _run_chunks(
+        self,
+        chunks: Iterable[list],
+        pool_size: Optional[int],
+        ordered: bool,
+        n_variants: Optional[int] = None,
+        start: int = 0,
+        backend: str = "process",
+    ) -> Iterator[list]:
+        """Pass the chunks of texts through the conveyer.
+
+        With `n_variants` every text is replaced with the list of its
+        augmented variants, they are never cached. `start` is the index of
+        the first text in the corpus. The pool of the `backend` is used if
+        `pool_size` is set.
+        """
+        indexed_chunks = (
+            (range(chunk_start, chunk_start + len(chunk)), chunk) for chunk_start, chunk in _with_offsets(chunks, start)
+        )
+        for _, processed_texts in self._run_indexed(indexed_chunks, pool_size, ordered, n_variants, backend):
+            yield processed_texts
+
+    def _run_indexed(
+        self,
+        indexed_chunks: Iterable[tuple],
+        pool_size: Optional[int],
+        ordered: bool,
+        n_variants: Optional[int] = None,
+        backend: str = "process",
+    ) -> Iterator[tuple]:
+        """Pass the chunks paired with the indices of their texts in the corpus through the conveyer.
+
+        The processed chunks are yielded together with the indices, so the
+        chunks of any texts of the corpus can be processed in any order.
+        """
+        fingerprint = self._cache_fingerprint() if n_variants is None else None
+        if self._pool is not None:
+            backend = self._pool_backend
+        elif pool_size is None:
+            backend = "serial"
+        use_shared_memory = self.transport == "shared_memory" and backend in PROCESS_BACKENDS
+        # the blocks of the chunks sent to the workers, freed when the result is back
+        in_flight = {}
+
+        def prepare(indices, chunk):
+            meta, args = self._prepare_chunk(indices, chunk, fingerprint)
+            shared_texts = SharedTexts.pack(args[0]) if use_shared_memory else None
+            if shared_texts is not None:
+                in_flight[shared_texts.name] = shared_texts
+                args = (shared_texts,) + args[1:]
+            if n_variants is not None:
+                args += (n_variants,)
+            return (indices, meta, shared_texts), args
+
+        jobs = (prepare(indices, chunk) for indices, chunk in indexed_chunks)
+        if self._pool is not None:
+            results = _imap_bounded(self._pool, jobs, self._pool_size * 2, ordered)
+        elif pool_size is not None:
+            results = self._imap_with_pool(pool_size, jobs, ordered, backend)
         else:
-            pass
+            results = ((meta, self._process_chunk(*args)) for meta, args in jobs)
+        try:
+            for (indices, meta, shared_texts), (processed_texts, profile) in results:
+                if shared_texts is not None:
+                    in_flight.pop(shared_texts.name).unlink()
+                if isinstance(processed_texts, SharedTexts):
+                    processed_texts = processed_texts.unpack(unlink=True)
+                if profile is not None:
+                    self.profile.merge(profile)
+                    for hook in self._profile_hooks:
+                        hook(profile)
+                yield indices, self._finish_chunk(meta, processed_texts)
+        finally:
+            for shared_texts in in_flight.values():
+                shared_texts.unlink()
+
+    def _imap_with_pool(
+        self, pool_size: int, jobs: Iterable[tuple], ordered: bool, backend: str = "process"
+    ) -> Iterator[tuple]:
+        with self._create_pool(pool_size, backend) as p:
+            yield from _imap_bounded(p, jobs, pool_size * 2, ordered)
+
+    @staticmethod
+    def _resolve_backend(pool_size: Optional[int], backend: Optional[str]) -> tuple:
+        """Fill the backend and the pool size that weren't set."""
+        if backend is None:
+            return pool_size, "serial" if pool_size is None else "process"
+        check_backend(backend)
+        if backend == "serial":
+            return None, backend
+        if pool_size is None and backend != "auto":
+            pool_size = cpu_count()
+        return pool_size, backend
+
+    def _calibrate(self, sample: list, n_variants: Optional[int] = None, start: int = 0) -> tuple:
+        """Process the sample serially and time it."""
+
+        def run():
+            return [
+                text for chunk in self._run_chunks([sample], None, True, n_variants, start) for text in chunk
+            ]
+
+        return Calibration.measure(run, len(sample))
+
+    def _process_texts(
+        self,
+        texts: list,
+        pool_size: Optional[int],
+        backend: Optional[str],
+        n_variants: Optional[int] = None,
+        schedule: "str | Callable[[Any], float]" = "count",
+        start: int = 0,
+    ) -> Iterator[list]:
+        """Split the texts into the chunks and process them with the backend.
+
+        `start` is the index of the first text in the corpus.
+        """
+        if schedule == "length":
+            cost = _text_cost
+        elif callable(schedule):
+            cost = schedule
+        elif schedule != "count":
+            raise ValueError(f"Unknown schedule {schedule}, expected 'count', 'length' or a callable")
+        pool_size, backend = self._resolve_backend(pool_size, backend)
+        if backend == "auto" and self._pool is None:
+            sample_size = calibration_sample_size(len(texts))
+            calibration, processed_sample = self._calibrate(list(texts[:sample_size]), n_variants, start)
+            yield processed_sample
+            texts = texts[sample_size:]
+            start += sample_size
+            backend, pool_size = calibration.choose(len(texts), pool_size)
+            self.last_backend = (backend, pool_size)
+            if not texts:
+                return
+        n_workers = self._pool_size if self._pool is not None else pool_size
+        if schedule != "count" and n_workers is not None:
+            costs = [cost(text) for text in texts]
+            yield self._run_balanced(texts, costs, n_workers, pool_size, n_variants, start, backend)
+            return
+        yield from self._run_chunks(self._split(texts, pool_size), pool_size, True, n_variants, start, backend)
+
+    def _run_balanced(
+        self,
+        texts: list,
+        costs: List[float],
+        n_workers: int,
+        pool_size: Optional[int],
+        n_variants: Optional[int],
+        start: int,
+        backend: str,
+    ) -> list:
+        """Process the chunks of similar cost, the costliest first, and restore the order of the texts."""
+        indexed_chunks = (
+            ([start + i for i in chunk], [texts[i] for i in chunk]) for chunk in _split_by_cost(costs, n_workers)
+        )
+        processed_texts = [None] * len(texts)
+        for indices, processed_chunk in self._run_indexed(indexed_chunks, pool_size, False, n_variants, backend):
+            if len(processed_chunk) != len(indices):
+                raise ValueError(
+                    "Text amount integrity  violated: the balanced chunks can't be put back in the order of the texts."
+                )
+            for i, processed_text in zip(indices, processed_chunk):
+                processed_texts[i - start] = processed_text
+        return processed_texts
+
+    def _run_backend(
+        self,
+        chunks: Iterable[list],
+        pool_size: Optional[int],
+        ordered: bool,
+        backend: Optional[str],
+        start: int = 0,
+    ) -> Iterator[list]:
+        """Process the chunks of unknown amount with the backend, "auto" times the first chunk."""
+        pool_size, backend = self._resolve_backend(pool_size, backend)
+        if backend == "auto" and self._pool is None:
+            chunks = iter(chunks)
+            first_chunk = next(chunks, None)
+            if first_chunk is None:
+                return
+            next_chunk = next(chunks, None)
+            calibration, processed_texts = self._calibrate(first_chunk, start=start)
+            yield processed_texts
+            start += len(first_chunk)
+            if next_chunk is None:
+                backend, pool_size = "serial", None
+            else:
+                backend, pool_size = calibration.choose(None, pool_size)
+                chunks = chain([next_chunk], chunks)
+            self.last_backend = (backend, pool_size)
+        yield from self._run_chunks(chunks, pool_size, ordered, start=start, backend=backend)
+
+    def __call__(
+        self,
+        texts: "str | list | pd.Series",
+        ensure_amount_integrity=True,
+        pool_size=None,
+        deduplicate=False,
+        backend=None,
+        schedule="count",
+        start=0,
+    ):
+        """Process the texts.
+
+        Args:
+            texts (str | list | pd.Series): texts to process.
+            ensure_amount_integrity (bool): check that the amount of the
+                processed texts is the same as the amount of the source ones.
+            pool_size (int): amount of workers. The persistent workers are
+                used if they were started.
+            deduplicate (bool): process every unique text only once and copy
+                the result to all its positions, the token lists are copied
+                too. It is ignored if the conveyer has stochastic units, e.g.
+                augmentations.
+            backend (str, optional): "serial", "thread", "process" or the
+                process start method "fork", "forkserver", "spawn". The thread
+                and process backends use all CPUs if `pool_size` isn't set.
+                "auto" times a sample of the texts and chooses the backend and
+                the pool size (not more than `pool_size` if it is set), the
+                choice is kept in `last_backend`. By default the processes
+                are used if `pool_size` is set.
+            schedule (str | Callable[[Any], float]): how the texts are split
+                between the workers. "count" makes the chunks of the same
+                amount of texts. "length" makes the chunks of similar total
+                length and sends the longest texts first, so the workers are
+                loaded evenly when the texts are of very different length. A
+                function estimating the cost of a text can be used instead of
+                the length. The result is in the order of the texts anyway.
+            start (int): index of the first text in the corpus. The stochastic
+                units key the random numbers of a text by its index, so a
+                shard of the corpus processed with the index of its first text
+                gives the same result as in the whole corpus, e.g. on another
+                machine: `fab(texts[k:], start=k) == fab(texts)[k:]`.
+        """
+        texts = self._to_list(texts)
         source_text_amount = len(texts)
-        if pool_size is not None:
-            with Pool(pool_size) as p:
-                processed_texts = p.map(self._process, texts)
-        else:
-            processed_texts = list(map(lambda x: self._process(x), texts))
+        positions = None
+        if deduplicate and not self._is_stochastic():
+            texts, positions = _deduplicate(texts)
+        processed_texts = []
+        for processed_chunk in self._process_texts(texts, pool_size, backend, schedule=schedule, start=start):
+            processed_texts.extend(processed_chunk)
+        if positions is not None:
+            if len(processed_texts) != len(texts):
+                raise ValueError(
+                    "Text amount integrity  violated: the deduplicated texts can't be matched with the processed ones."
+                )
+            processed_texts = _scatter(processed_texts, positions)
         if ensure_amount_integrity and len(processed_texts) != source_text_amount:
             raise ValueError(
                 "Text amount integrity  violated: the source text amount doesn't match with processed text."
             )
         return processed_texts
 
+    def augment(
+        self,
+        texts: "str | list | pd.Series",
+        n_variants: int,
+        pool_size=None,
+        backend=None,
+        schedule="count",
+        start=0,
+    ) -> list:
+        """Make `n_variants` augmented variants of every text.
+
+        The units before the first stochastic unit are run once, only the
+        rest of the conveyer is run for every variant. The first variant is
+        the same as the result of the fabric call.
+
+        Args:
+            texts (str | list | pd.Series): texts to augment.
+            n_variants (int): amount of the variants of every text.
+            pool_size (int): amount of workers. The persistent workers are
+                used if they were started.
+            backend (str, optional): the backend of the workers, see `__call__`.
+            schedule (str | Callable[[Any], float]): how the texts are split
+                between the workers, see `__call__`.
+            start (int): index of the first text in the corpus, see `__call__`.
+
+        Returns:
+            list: the list of the variants for every text in the order of
+                the texts.
+        """
+        if n_variants < 1:
+            raise ValueError("The amount of variants must be positive")
+        texts = self._to_list(texts)
+        variants = []
+        for chunk_variants in self._process_texts(texts, pool_size, backend, n_variants, schedule, start):
+            variants.extend(chunk_variants)
+        if len(variants) != len(texts):
+            raise ValueError(
+                "Text amount integrity  violated: the source text amount doesn't match with processed text."
+            )
+        return variants
+
+    def process_series(self, series: "pd.Series", ensure_amount_integrity=True) -> "pd.Series":
+        """Process the pandas Series keeping its index.
+
+        The texts stay in the series between the units. The units with a
+        vectorized equivalent (`lower_string`, `strip_string`, `collapse_spaces`,
+        the regex removals, ...) run as the whole-column `.str` methods, the
+        rest of the units process the texts of the series as a batch. The
+        cache and the workers are not used.
+
+        Args:
+            series (pd.Series): texts to process.
+            ensure_amount_integrity (bool): check that the amount of the
+                processed texts is the same as the amount of the source ones.
+        """
+        import pandas as pd
+
+        source_text_amount = len(series)
+        positions = {id(u): i for i, u in enumerate(self.conveyer)}
+        for u in self._stages():
+            if u.stochastic:
+                key = (positions.get(id(u), -1),)
+                texts = u.process_indexed_batch(series.to_list(), range(len(series)), key)
+                series = pd.Series(texts, index=series.index, name=series.name, dtype=object)
+            else:
+                series = u.process_series(series)
+        if ensure_amount_integrity and len(series) != source_text_amount:
+            raise ValueError(
+                "Text amount integrity  violated: the source text amount doesn't match with processed text."
+            )
+        return series
+
+    def process_frame(self, frame: "pd.DataFrame", columns: "str | List[str]") -> "pd.DataFrame":
+        """Process the text columns of the DataFrame with `process_series`.
+
+        Args:
+            frame (pd.DataFrame): the data.
+            columns (str | List[str]): the columns to process.
+
+        Returns:
+            pd.DataFrame: the copy of the frame with the processed columns.
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+        frame = frame.copy(deep=False)
+        for column in columns:
+            frame[column] = self.process_series(frame[column])
+        return frame
+
+    def process_arrow(
+        self,
+        data: "pa.Array | pa.ChunkedArray | pa.RecordBatch | pa.Table",
+        column: Optional[str] = None,
+        output_column: Optional[str] = None,
+        pool_size=None,
+        backend=None,
+    ) -> "pa.Array | pa.ChunkedArray | pa.RecordBatch | pa.Table":
+        """Process the pyarrow data by record batches.
+
+        The result is of the same type as the data. For the arrays the
+        texts are processed, for the record batches and tables the column
+        with the texts is processed and the rest of columns are kept as is.
+        The nulls are kept and not sent to the conveyer. Requires pyarrow.
+
+        Args:
+            data (pa.Array | pa.ChunkedArray | pa.RecordBatch | pa.Table): texts to process.
+            column (str, optional): the column with the texts of the record
+                batch or table.
+            output_column (str, optional): the column for the result, the
+                text column is replaced by default.
+            pool_size (int): amount of workers. The persistent workers are
+                used if they were started.
+            backend (str, optional): the backend of the workers, see
+                `__call__`. "auto" times the first record batch.
+        """
+        from .arrow import process_arrow
+
+        return process_arrow(self, data, column, output_column, pool_size, backend)
+
+    def process_parquet(
+        self,
+        source: str,
+        destination: str,
+        column: str,
+        output_column: Optional[str] = None,
+        batch_size: int = 65536,
+        pool_size=None,
+        backend=None,
+    ):
+        """Process the text column of the Parquet file and write the result to another one.
+
+        The file is read and written by record batches without pandas, so
+        only a few batches are kept in memory at a time. Requires pyarrow.
+
+        Args:
+            source (str): path to the source Parquet file.
+            destination (str): path to the result Parquet file.
+            column (str): the column with the texts.
+            output_column (str, optional): the column for the result, the
+                text column is replaced by default.
+            batch_size (int): amount of rows in the record batch.
+            pool_size (int): amount of workers. The persistent workers are
+                used if they were started.
+            backend (str, optional): the backend of the workers, see
+                `__call__`. "auto" times the first record batch.
+        """
+        from .arrow import process_parquet
+
+        process_parquet(self, source, destination, column, output_column, batch_size, pool_size, backend)
+
+    @staticmethod
+    def _to_list(texts: "str | list | pd.Series") -> list:
+        if isinstance(texts, str):
+            return [texts]
+        elif _is_instance(texts, "pandas", "Series"):
+            return texts.to_list()
+        return texts
+
+    def _split(self, texts: list, pool_size: Optional[int]) -> list:
+        """Split the texts into the chunks for the workers."""
+        if self._pool is not None:
+            return _split_batches(texts, self._pool_size * 4)
+        elif pool_size is not None:
+            return _split_batches(texts, pool_size * 4)
+        return [list(texts)]
+
+    def stream(
+        self,
+        texts: Iterable,
+        pool_size: int = None,
+        chunksize: int = 1000,
+        ordered: bool = True,
+        ensure_amount_integrity: bool = True,
+        backend: Optional[str] = None,
+        start: int = 0,
+    ) -> Iterator:
+        """Process the texts lazily and yield the results as they are ready.
+
+        The texts are read from any iterable by chunks, so only a few chunks
+        are kept in memory at a time. It makes possible to process the
+        corpora that don't fit in memory, e.g. the lines of a file:
+
+            with open("corpus.txt") as f:
+                for text in fab.stream(f, pool_size=4):
+                    ...
+
+        Args:
+            texts (Iterable): texts to process.
+            pool_size (int): amount of workers. The persistent workers are
+                used if they were started.
+            chunksize (int): amount of texts sent to the conveyer at once.
+            ordered (bool): yield the results in the order of the texts.
+                Otherwise the chunks are yielded as soon as they are done.
+            ensure_amount_integrity (bool): check that the amount of the
+                processed texts is the same as the amount of the source ones.
+            backend (str, optional): the backend of the workers, see
+                `__call__`. "auto" times the first chunk.
+            start (int): index of the first text in the corpus, see `__call__`.
+        """
+        source_text_amount = 0
+
+        def count(chunks):
+            nonlocal source_text_amount
+            for chunk in chunks:
+                source_text_amount += len(chunk)
+                yield chunk
+
+        chunks = count(_iter_chunks(texts, chunksize))
+        processed_text_amount = 0
+        for processed_texts in self._run_backend(chunks, pool_size, ordered, backend, start):
+            processed_text_amount += len(processed_texts)
+            yield from processed_texts
+        if ensure_amount_integrity and processed_text_amount != source_text_amount:
+            raise ValueError(
+                "Text amount integrity  violated: the source text amount doesn't match with processed text."
+            )
+
+    def start_batcher(
+        self,
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        max_queue_size: int = 1024,
+        executor: str = "thread",
+        workers: int = 1,
+    ) -> "MicroBatcher":
+        """Set up the micro-batching of the texts passed to `aprocess`.
+
+        The texts of the concurrent requests are collected into batches that
+        are processed in the executor, so the event loop isn't blocked.
+
+        Args:
+            max_batch_size (int): maximal amount of texts in the batch.
+            max_wait (float): maximal time in seconds the first text of the
+                batch waits for the others.
+            max_queue_size (int): maximal amount of the waiting texts. The
+                callers of `aprocess` wait when the queue is full.
+            executor (str): "thread" or "process". The threads suit the units
+                waiting on IO like Mystem, the processes suit the CPU-bound
+                units like regexes. The processes are the persistent workers.
+            workers (int): amount of threads or worker processes.
+        """
+        from .serving import MicroBatcher
+
+        if self._batcher is not None:
+            raise RuntimeError("The batcher is already started, stop it with `stop_batcher` first")
+        self._batcher = MicroBatcher(self, max_batch_size, max_wait, max_queue_size, executor, workers)
+        return self._batcher
+
+    async def aprocess(self, text: Any) -> Any:
+        """Process the text without blocking the event loop.
+
+        The text is processed in a micro-batch with the texts of the other
+        concurrent calls. The batcher with the default params is started on
+        the first call if `start_batcher` wasn't called:
+
+            results = await asyncio.gather(*(fab.aprocess(text) for text in texts))
+
+        Args:
+            text (Any): text to process.
+        """
+        if self._batcher is None:
+            self.start_batcher()
+        return await self._batcher.process(text)
+
+    async def stop_batcher(self):
+        """Process the waiting texts of `aprocess` and stop the batcher."""
+        if self._batcher is not None:
+            batcher, self._batcher = self._batcher, None
+            await batcher.stop()
+
+    def _create_pool(self, pool_size: int, backend: str = "process") -> Pool:
+        if self.transport == "shared_memory" and backend in PROCESS_BACKENDS:
+            SharedTexts.start_tracking()
+        return create_pool(
+            backend,
+            pool_size,
+            initializer=_init_worker,
+            initargs=(self._worker_config(), self._worker_options()),
+        )
+
+    def _worker_options(self) -> dict:
+        return {"fuse_units": self.fuse_units, "profile": self.profile is not None}
+
+    def _worker_config(self) -> list:
+        """Config the workers build their own conveyer from.
+
+        The textfab units are passed by name, so the heavy ones (e.g. Mystem)
+        are created inside the worker. The custom unit objects are passed as is.
+        """
+        conf_list = []
+        for u in self.conveyer:
+            if u.__class__.__module__.startswith("textfab."):
+                conf_list.append(self._unit_config(u))
+            else:
+                conf_list.append(u)
+        return conf_list
+
+    def start_workers(self, pool_size: int, backend: str = "process"):
+        """Start a persistent pool of workers attached to the fabric.
+
+        Every worker builds the conveyer once and keeps it between the calls,
+        so the subsequent calls don't pay for the pool startup. The fabric
+        can be used as a context manager to stop the workers on exit:
+
+            with fab.start_workers(4):
+                fab(batch_1)
+                fab(batch_2)
+
+        Args:
+            pool_size (int): amount of workers.
+            backend (str): "thread", "process" or the process start method
+                "fork", "forkserver", "spawn".
+        """
+        if backend not in ("thread",) + PROCESS_BACKENDS:
+            raise ValueError(f"The backend {backend} can't start the persistent workers")
+        self.stop_workers()
+        self._pool = self._create_pool(pool_size, backend)
+        self._pool_size = pool_size
+        self._pool_backend = backend
+        return self
+
+    def stop_workers(self):
+        """Stop the persistent pool of workers if it was started."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._pool_size = None
+            self._pool_backend = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop_workers()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        state["_batcher"] = None
+        state["cache"] = None
+        state["_profile_hooks"] = []
+        return state
+
     def __repr__(self) -> str:
         conv_structure = "->\n".join([str(x) for x in self.conveyer])
         return f"Conveyer sequence:\n{conv_structure}\n"
 
     @classmethod
     def load_from_config(cls, cfg_path: str):
+        from omegaconf import OmegaConf
+
         conf = OmegaConf.load(cfg_path)
         return cls(conf)
-    
+
+    @staticmethod
+    def _new_unit(unit_class: type) -> ProcessUnit:
+        """Build the unit given by the name only, the param units get the empty params."""
+        if issubclass(unit_class, (ParamChangingProcessUnit, ParamProcessUnit)):
+            return unit_class({})
+        return unit_class()
+
+    @staticmethod
+    def _unit_config(u: ProcessUnit):
+        module = u.__class__.__module__
+        if module.startswith("textfab."):
+            name = u.__class__.__name__
+        else:
+            name = f"{module}.{u.__class__.__name__}"
+        # the units without params are written by the name, so the config and
+        # the fingerprint don't change when a unit gets optional params
+        if (isinstance(u, ParamChangingProcessUnit) or isinstance(u, ParamProcessUnit)) and u.param:
+            return {name: u.param}
+        return name
+
     def save_to_config(self, cfg_path: str):
-        conf_list = []
-        for u in self.conveyer:
-            module = u.__class__.__module__
-            if module.startswith("textfab."):
-                if isinstance(u, ParamChangingProcessUnit) or isinstance(u, ParamProcessUnit):
-                    conf_list.append({u.__class__.__name__: u.param})
-                else:
-                    conf_list.append(u.__class__.__name__)
-            else:
-                if isinstance(u, ParamChangingProcessUnit) or isinstance(u, ParamProcessUnit):
-                    conf_list.append({f"{u.__class__.__module__}.{u.__class__.__name__}": u.param})
-                else:
-                    conf_list.append(f"{u.__class__.__module__}.{u.__class__.__name__}")
+        from omegaconf import OmegaConf
+
+        conf_list = [self._unit_config(u) for u in self.conveyer]
         conf_list = OmegaConf.create(conf_list)
         with open(cfg_path, 'w') as f:
-            OmegaConf.save(conf_list, f)
\ No newline at end of file
+            OmegaConf.save(conf_list, f)
@@ -0,0 +1,180 @@
+"""Execution plan of the conveyer.
+
+The fabric doesn't run the conveyer units one by one as they are listed in
+the config. Consecutive units that can be merged without changing the result
+are replaced with a single fused unit, and the others are kept as is.
+"""
+import re
+from typing import TYPE_CHECKING, List
+
+from .base import ProcessUnit, is_text_series
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _keeps_process(unit: ProcessUnit, attribute: str) -> bool:
+    """Check that `process` isn't overridden below the class defining `attribute`.
+
+    A subclass of a fusable unit may change `process`, then the attributes it
+    inherited don't describe what the unit does anymore.
+    """
+    unit_class = type(unit)
+    for cls in unit_class.__mro__:
+        if attribute in vars(cls):
+            return unit_class.process is cls.process
+    return True
+
+
+def is_regex_unit(unit: ProcessUnit) -> bool:
+    """Check whether the unit is a single regex substitution.
+
+    Such unit has `sub_pattern` (compiled regex) and `sub_repl` (replacement
+    string) attributes. If it removes every character of some set, it also
+    has `deleted_chars` attribute with a regex character class of this set.
+    """
+    return (
+        getattr(unit, "sub_pattern", None) is not None
+        and isinstance(getattr(unit, "sub_repl", None), str)
+        and _keeps_process(unit, "sub_repl")
+    )
+
+
+class fused_regex_units(ProcessUnit):
+    """Run a sequence of regex substitution units in the fewest passes.
+
+    The units that remove every character of some set are merged into one
+    alternation when they follow each other: removing the characters of one
+    set and then of another one is the same as removing the characters of
+    their union. The rest of substitutions keep their own pass.
+    """
+
+    def __init__(self, units: List[ProcessUnit]) -> None:
+        super().__init__()
+        self.units = units
+        self.passes = []
+        charsets = []
+        for u in units:
+            charset = getattr(u, "deleted_chars", None)
+            if charset is not None:
+                charsets.append(charset)
+                continue
+            if charsets:
+                self.passes.append(self._charset_pass(charsets))
+                charsets = []
+            self.passes.append((u.sub_pattern, u.sub_repl))
+        if charsets:
+            self.passes.append(self._charset_pass(charsets))
+
+    @staticmethod
+    def _charset_pass(charsets: List[str]):
+        return re.compile("(?:" + "|".join(charsets) + ")+"), ""
+
+    def process(self, text: str) -> str:
+        for pattern, repl in self.passes:
+            text = pattern.sub(repl, text)
+        return text
+
+    def process_series(self, series: "pd.Series") -> "pd.Series":
+        if not is_text_series(series):
+            return super().process_series(series)
+        for pattern, repl in self.passes:
+            series = series.str.replace(pattern, repl, regex=True)
+        return series
+
+    def __str__(self) -> str:
+        return "+".join(str(u) for u in self.units)
+
+
+class ContextSensitiveChar(Exception):
+    """The mapping of the char depends on its neighbours in the text."""
+
+
+def is_char_unit(unit: ProcessUnit) -> bool:
+    """Check whether the unit maps every character independently.
+
+    Such unit has `translate_char` method that returns the replacement of
+    one character, or None if the replacement depends on the context.
+    """
+    return callable(getattr(unit, "translate_char", None)) and _keeps_process(unit, "translate_char")
+
+
+class char_map(dict):
+    """Per-codepoint table for `str.translate` filled on demand.
+
+    The replacement of a codepoint is computed by passing the character
+    through the units one after another and is cached afterwards. The
+    translation raises `ContextSensitiveChar` on a character that can't be
+    mapped independently, so the caller can fall back to the units.
+    """
+
+    def __init__(self, units: List[ProcessUnit]) -> None:
+        super().__init__()
+        self.units = units
+        self.context_sensitive = set()
+
+    def __missing__(self, code: int) -> str:
+        if code in self.context_sensitive:
+            raise ContextSensitiveChar(chr(code))
+        chars = chr(code)
+        for u in self.units:
+            mapped = [u.translate_char(c) for c in chars]
+            if None in mapped:
+                self.context_sensitive.add(code)
+                raise ContextSensitiveChar(chr(code))
+            chars = "".join(mapped)
+        self[code] = chars
+        return chars
+
+
+class fused_char_units(ProcessUnit):
+    """Run a sequence of per-character units as one `str.translate` call.
+
+    If the text has a character that can't be mapped independently (e.g.
+    the capital sigma for `lower_string`), the text is passed through the
+    units one after another.
+    """
+
+    def __init__(self, units: List[ProcessUnit]) -> None:
+        super().__init__()
+        self.units = units
+        self.table = char_map(units)
+
+    def process(self, text: str) -> str:
+        try:
+            return text.translate(self.table)
+        except ContextSensitiveChar:
+            for u in self.units:
+                text = u.process(text)
+            return text
+
+    def __str__(self) -> str:
+        return "+".join(str(u) for u in self.units)
+
+
+def _fuse_run(run: List[ProcessUnit]) -> List[ProcessUnit]:
+    if len(run) < 2:
+        return run
+    if is_regex_unit(run[0]):
+        return [fused_regex_units(run)]
+    return [fused_char_units(run)]
+
+
+def plan_conveyer(conveyer: List[ProcessUnit]) -> List[ProcessUnit]:
+    """Build the sequence of units the fabric actually runs.
+
+    Args:
+        conveyer (List[ProcessUnit]): units as they are listed in the config.
+    """
+    plan = []
+    run = []
+    for u in conveyer:
+        if run and is_regex_unit(run[0]) and is_regex_unit(u):
+            run.append(u)
+        elif run and is_char_unit(run[0]) and is_char_unit(u):
+            run.append(u)
+        else:
+            plan.extend(_fuse_run(run))
+            run = [u]
+    plan.extend(_fuse_run(run))
+    return plan
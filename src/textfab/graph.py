@@ -0,0 +1,256 @@
+"""Several fabrics over one corpus that share the common unit prefixes.
+
+The configs are merged into a tree: the units that the configs start with
+are run once and their result goes to the rest of every config, so every
+shared stage is computed once per text. The result of every config is the
+same as of the separate fabric: the texts that are not strings, e.g. the
+lists of tokens, are copied for every output and branch that share them, so
+the units that change them in place don't affect the others.
+"""
+import copy
+import json
+import threading
+from multiprocessing.pool import Pool
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional
+
+from .backends import PROCESS_BACKENDS, Calibration, calibration_sample_size, create_pool
+from .fabric import Fabric, _is_instance, _split_batches, _to_container, _with_offsets
+from .fusion import plan_conveyer
+from .tokens import TokenizedText
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# The graph that a pool worker builds once in its initializer, kept per
+# thread as the fabric of the worker.
+_graph_worker = threading.local()
+
+
+def _init_graph_worker(configs: dict, fuse_units: bool):
+    _graph_worker.graph = FabricGraph(configs, fuse_units=fuse_units)
+
+
+def _process_in_graph_worker(job: tuple):
+    return _graph_worker.graph._process_chunk(*job)
+
+
+def _copy_texts(texts: list) -> list:
+    """Copy the texts that can be changed in place, the strings and `TokenizedText` are immutable."""
+    return [text if isinstance(text, (str, TokenizedText)) else copy.deepcopy(text) for text in texts]
+
+
+class _Branch:
+    """Chain of units shared by the outputs below it.
+
+    Attributes:
+        units (list): units of the chain.
+        position (int): position of the first unit in the conveyers.
+        stages (list): units that are actually run, e.g. fused.
+        outputs (List[str]): names of the configs that end after the chain.
+        children (List[_Branch]): branches that go after the chain.
+    """
+
+    def __init__(self, units: list, position: int) -> None:
+        self.units = units
+        self.position = position
+        self.stages = units
+        self.outputs = []
+        self.children = []
+
+
+class FabricGraph:
+    """Run several configs over the same texts in one pass.
+
+    Args:
+        configs (Dict[str, list]): configs of the fabrics by the names of the
+            outputs.
+        fuse_units (bool): merge the consecutive units of every chain that
+            can be run in one pass, see `Fabric`.
+    """
+
+    def __init__(self, configs: Dict[str, list], fuse_units: bool = True) -> None:
+        if not (isinstance(configs, dict) or _is_instance(configs, "omegaconf", "DictConfig")):
+            raise ValueError("The configs are not a dict")
+        self.fuse_units = fuse_units
+        self.fabrics = {str(name): Fabric(config, fuse_units=fuse_units) for name, config in configs.items()}
+        self.root = self._build_tree()
+        self._pool = None
+        self._pool_size = None
+
+    @staticmethod
+    def _unit_key(u: Any) -> tuple:
+        """Equal keys for the units that can be run once for several configs.
+
+        The textfab units are compared by their config, the custom unit
+        objects are shared only if it is the same object.
+        """
+        if u.__class__.__module__.startswith("textfab."):
+            config = _to_container(Fabric._unit_config(u))
+            return ("config", json.dumps(config, sort_keys=True, ensure_ascii=False))
+        return ("object", id(u))
+
+    def _build_tree(self) -> _Branch:
+        # The prefix tree with one unit per node: [unit, children, outputs].
+        trie = [None, {}, []]
+        for name, fab in self.fabrics.items():
+            node = trie
+            for u in fab.conveyer:
+                node = node[1].setdefault(self._unit_key(u), [u, {}, []])
+            node[2].append(name)
+        return self._compress(trie, [], 0)
+
+    def _compress(self, node: list, units: list, position: int) -> _Branch:
+        """Merge the nodes with a single child into the chains."""
+        while len(node[1]) == 1 and not node[2]:
+            node = next(iter(node[1].values()))
+            units.append(node[0])
+        branch = _Branch(units, position)
+        if self.fuse_units:
+            branch.stages = plan_conveyer(units)
+        branch.outputs = node[2]
+        for child in node[1].values():
+            branch.children.append(self._compress(child, [child[0]], position + len(units)))
+        return branch
+
+    def _run_branch(self, branch: _Branch, texts: list, start: int, results: Dict[str, list]) -> None:
+        positions = {id(u): branch.position + i for i, u in enumerate(branch.units)}
+        for u in branch.stages:
+            indices = range(start, start + len(texts))
+            texts = u.process_indexed_batch(texts, indices, (positions.get(id(u), -1),))
+        # every consumer but the last one gets its own copy of the texts
+        n_consumers = len(branch.outputs) + len(branch.children)
+        for i, name in enumerate(branch.outputs):
+            results[name] = _copy_texts(texts) if i < n_consumers - 1 else list(texts)
+        for i, child in enumerate(branch.children, len(branch.outputs)):
+            self._run_branch(child, _copy_texts(texts) if i < n_consumers - 1 else texts, start, results)
+
+    def _process_chunk(self, texts: list, start: int = 0) -> Dict[str, list]:
+        results = {}
+        self._run_branch(self.root, texts, start, results)
+        return results
+
+    def _worker_configs(self) -> dict:
+        return {name: fab._worker_config() for name, fab in self.fabrics.items()}
+
+    def _create_pool(self, pool_size: int, backend: str = "process") -> Pool:
+        return create_pool(
+            backend,
+            pool_size,
+            initializer=_init_graph_worker,
+            initargs=(self._worker_configs(), self.fuse_units),
+        )
+
+    def start_workers(self, pool_size: int, backend: str = "process"):
+        """Start a persistent pool of workers attached to the graph, see `Fabric.start_workers`."""
+        if backend not in ("thread",) + PROCESS_BACKENDS:
+            raise ValueError(f"The backend {backend} can't start the persistent workers")
+        self.stop_workers()
+        self._pool = self._create_pool(pool_size, backend)
+        self._pool_size = pool_size
+        return self
+
+    def stop_workers(self):
+        """Stop the persistent pool of workers if it was started."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._pool_size = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop_workers()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        return state
+
+    def _run_chunks(
+        self, texts: list, pool_size: Optional[int], backend: Optional[str] = None
+    ) -> Iterator[Dict[str, list]]:
+        pool_size, backend = Fabric._resolve_backend(pool_size, backend)
+        start = 0
+        if self._pool is not None:
+            pool_size = self._pool_size
+        elif backend == "auto":
+            start = calibration_sample_size(len(texts))
+            calibration, processed_sample = Calibration.measure(
+                lambda: self._process_chunk(list(texts[:start])), start
+            )
+            yield processed_sample
+            texts = texts[start:]
+            backend, pool_size = calibration.choose(len(texts), pool_size)
+            if not texts:
+                return
+        if pool_size is None:
+            yield self._process_chunk(list(texts), start)
+            return
+        jobs = ((chunk, offset) for offset, chunk in _with_offsets(_split_batches(texts, pool_size * 4), start))
+        if self._pool is not None:
+            yield from self._pool.imap(_process_in_graph_worker, jobs)
+            return
+        with self._create_pool(pool_size, backend) as p:
+            yield from p.imap(_process_in_graph_worker, jobs)
+
+    def __call__(
+        self, texts: "str | list | pd.Series", ensure_amount_integrity=True, pool_size=None, backend=None
+    ) -> "Dict[str, list] | pd.DataFrame":
+        """Process the texts with every config.
+
+        Args:
+            texts (str | list | pd.Series): texts to process.
+            ensure_amount_integrity (bool): check that the amount of the
+                processed texts of every config is the same as the amount of
+                the source ones.
+            pool_size (int): amount of workers. The persistent workers are
+                used if they were started.
+            backend (str, optional): the backend of the workers, see `Fabric`.
+
+        Returns:
+            Dict[str, list] | pd.DataFrame: the processed texts by the names
+                of the configs. For the `pd.Series` it is the DataFrame with
+                the column per config and the index of the series.
+        """
+        index = texts.index if _is_instance(texts, "pandas", "Series") else None
+        texts = Fabric._to_list(texts)
+        results = {name: [] for name in self.fabrics}
+        for chunk_result in self._run_chunks(texts, pool_size, backend):
+            for name, processed_texts in chunk_result.items():
+                results[name].extend(processed_texts)
+        if ensure_amount_integrity:
+            for name, processed_texts in results.items():
+                if len(processed_texts) != len(texts):
+                    raise ValueError(
+                        f"Text amount integrity  violated: the source text amount doesn't match with processed text of {name}."
+                    )
+        if index is not None:
+            import pandas as pd
+
+            return pd.DataFrame(results, index=index)
+        return results
+
+    @classmethod
+    def load_from_config(cls, cfg_path: str):
+        """Load the graph from the YAML file with the configs by the output names."""
+        from omegaconf import OmegaConf
+
+        conf = OmegaConf.load(cfg_path)
+        return cls(conf)
+
+    def __repr__(self) -> str:
+        lines = []
+
+        def walk(branch: _Branch, depth: int) -> None:
+            chain = "->".join(str(u) for u in branch.units)
+            outputs = "".join(f" => {name}" for name in branch.outputs)
+            if chain or outputs:
+                lines.append("  " * depth + chain + outputs)
+            for child in branch.children:
+                walk(child, depth + 1)
+
+        walk(self.root, 0)
+        structure = "\n".join(lines)
+        return f"Fabric graph:\n{structure}\n"
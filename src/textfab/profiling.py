@@ -0,0 +1,118 @@
+"""Per-unit profiling of the fabric runs.
+
+The stats are collected for every call of `process_batch` of the unit. They
+are plain data, so the stats collected in the pool workers are sent to the
+main process and merged there.
+"""
+import math
+from typing import Any, Dict, List
+
+# The durations of the calls are counted in the buckets growing by this
+# factor, so the percentiles are within about 4% of the exact ones and the
+# stats take the same memory however long the fabric runs.
+BUCKET_GROWTH = 2 ** (1 / 8)
+# The lower bound of the smallest bucket in seconds, the shorter calls fall in it.
+MIN_DURATION = 1e-7
+
+
+def _bucket(duration: float) -> int:
+    if duration <= MIN_DURATION:
+        return 0
+    return int(math.log(duration / MIN_DURATION, BUCKET_GROWTH)) + 1
+
+
+def _bucket_duration(bucket: int) -> float:
+    """Geometric middle of the bucket."""
+    if bucket == 0:
+        return MIN_DURATION
+    return MIN_DURATION * BUCKET_GROWTH ** (bucket - 0.5)
+
+
+def batch_size(texts: List[Any]) -> int:
+    """Total size of the batch: characters for strings, tokens for lists."""
+    return sum(len(text) for text in texts if hasattr(text, "__len__"))
+
+
+class UnitStats:
+    """Stats of one unit of the conveyer.
+
+    Attributes:
+        name (str): unit representation.
+        calls (int): amount of the `process_batch` calls.
+        texts (int): amount of the processed texts.
+        total_time (float): cumulative wall time in seconds.
+        histogram (Dict[int, int]): amount of the calls by the buckets of
+            their wall time, see `BUCKET_GROWTH`.
+        size_in (int): size of the input texts.
+        size_out (int): size of the output texts.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.texts = 0
+        self.total_time = 0.0
+        self.histogram: Dict[int, int] = {}
+        self.size_in = 0
+        self.size_out = 0
+
+    def record(self, duration: float, texts: int, size_in: int, size_out: int) -> None:
+        self.calls += 1
+        self.texts += texts
+        self.total_time += duration
+        bucket = _bucket(duration)
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+        self.size_in += size_in
+        self.size_out += size_out
+
+    def merge(self, other: "UnitStats") -> None:
+        self.calls += other.calls
+        self.texts += other.texts
+        self.total_time += other.total_time
+        for bucket, count in other.histogram.items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+        self.size_in += other.size_in
+        self.size_out += other.size_out
+
+    def percentile(self, q: float) -> float:
+        """Approximate wall time of a call at the percentile `q` from 0 to 100."""
+        n_calls = sum(self.histogram.values())
+        if not n_calls:
+            return 0.0
+        rank = min(n_calls - 1, int(n_calls * q / 100))
+        for bucket in sorted(self.histogram):
+            rank -= self.histogram[bucket]
+            if rank < 0:
+                return _bucket_duration(bucket)
+        return 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name} [calls={self.calls} texts={self.texts} "
+            f"total={self.total_time:.4f}s p50={self.percentile(50) * 1000:.3f}ms "
+            f"p90={self.percentile(90) * 1000:.3f}ms p99={self.percentile(99) * 1000:.3f}ms "
+            f"size={self.size_in}->{self.size_out}]"
+        )
+
+
+class FabricProfile:
+    """Stats of all units of the conveyer in the conveyer order.
+
+    Args:
+        names (List[str]): representations of the units.
+    """
+
+    def __init__(self, names: List[str]) -> None:
+        self.units = [UnitStats(name) for name in names]
+
+    def merge(self, other: "FabricProfile") -> None:
+        for stats, other_stats in zip(self.units, other.units):
+            stats.merge(other_stats)
+
+    @property
+    def total_time(self) -> float:
+        return sum(stats.total_time for stats in self.units)
+
+    def __repr__(self) -> str:
+        conv_structure = "->\n".join([str(x) for x in self.units])
+        return f"Conveyer profile:\n{conv_structure}\n"
@@ -0,0 +1,187 @@
+"""Asyncio interface of the fabric for the online serving.
+
+The texts of the concurrent requests are collected into micro-batches that
+are processed in an executor, so the event loop is never blocked and the
+units with a costly call (e.g. Mystem) are called once per batch instead of
+once per request. The queue of the waiting requests is bounded: when it is
+full, the callers wait for a free place.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Optional, Set
+
+if TYPE_CHECKING:
+    from .fabric import Fabric
+
+EXECUTORS = ("thread", "process")
+
+# The marker that stops the collecting of the batches.
+_STOP = object()
+
+
+class MicroBatcher:
+    """Collect the texts of the concurrent requests into batches for the fabric.
+
+    A batch is sent to the executor when it has `max_batch_size` texts or
+    `max_wait` seconds passed since its first text was received. Up to
+    `workers` batches are processed at a time, the rest of the requests wait
+    in the queue. If the batch fails, its texts are processed one by one, so
+    only the callers of the failing texts get the exception.
+
+    Args:
+        fab (Fabric): the fabric.
+        max_batch_size (int): maximal amount of texts in the batch.
+        max_wait (float): maximal time in seconds the first text of the batch
+            waits for the others.
+        max_queue_size (int): maximal amount of the waiting texts. The
+            callers wait for a free place when the queue is full.
+        executor (str): "thread" runs the batches in the threads of the main
+            process, it suits the units waiting on IO, e.g. Mystem. With more
+            than one worker every thread builds its own conveyer, as in the
+            thread backend. "process" runs them in the persistent workers of
+            the fabric. The workers are started if they weren't.
+        workers (int): amount of threads or worker processes.
+    """
+
+    def __init__(
+        self,
+        fab: "Fabric",
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        max_queue_size: int = 1024,
+        executor: str = "thread",
+        workers: int = 1,
+    ) -> None:
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor {executor}, expected one of {EXECUTORS}")
+        if max_batch_size < 1 or workers < 1:
+            raise ValueError("The batch size and the amount of workers must be positive")
+        self.fab = fab
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue_size = max_queue_size
+        self.executor = executor
+        self.workers = workers
+        self._owns_workers = False
+        if fab._pool is None and (executor == "process" or workers > 1):
+            fab.start_workers(workers, "process" if executor == "process" else "thread")
+            self._owns_workers = True
+        self._threads = ThreadPoolExecutor(workers, thread_name_prefix="textfab")
+        self._loop = None
+        self._queue = None
+        self._slots = None
+        self._collector = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+        # The index of the next text, so the stochastic units don't repeat
+        # the same random draws in every batch.
+        self._offset = 0
+
+    def _ensure_started(self) -> None:
+        """Bind the queue and the collecting task to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(self.max_queue_size)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._tasks = set()
+        self._collector = loop.create_task(self._collect())
+
+    async def process(self, text: Any) -> Any:
+        """Process the text together with the texts of the concurrent requests."""
+        if self._closed:
+            raise RuntimeError("The batcher is stopped")
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _next_batch(self) -> tuple:
+        """Wait for the first text and collect the rest of the batch.
+
+        Returns:
+            tuple: the batch and whether the batcher is stopped.
+        """
+        item = await self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            try:
+                if timeout > 0:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                else:
+                    item = self._queue.get_nowait()
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _collect(self) -> None:
+        stopped = False
+        while not stopped:
+            batch, stopped = await self._next_batch()
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            await self._slots.acquire()
+            task = self._loop.create_task(self._run(batch, self._offset))
+            self._offset += len(batch)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _process_batch(self, texts: list, start: int) -> list:
+        processed_texts = []
+        for processed_chunk in self.fab._run_chunks([texts], None, ordered=True, start=start):
+            processed_texts.extend(processed_chunk)
+        if len(processed_texts) != len(texts):
+            raise ValueError(
+                "Text amount integrity  violated: the source text amount doesn't match with processed text."
+            )
+        return processed_texts
+
+    async def _run_one_by_one(self, batch: list, start: int) -> None:
+        """Process the texts of the failed batch separately, every caller gets its own result."""
+        for i, (text, future) in enumerate(batch):
+            try:
+                processed_texts = await self._loop.run_in_executor(
+                    self._threads, self._process_batch, [text], start + i
+                )
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(processed_texts[0])
+
+    async def _run(self, batch: list, start: int) -> None:
+        texts = [text for text, _ in batch]
+        try:
+            processed_texts = await self._loop.run_in_executor(self._threads, self._process_batch, texts, start)
+        except Exception:
+            await self._run_one_by_one(batch, start)
+        else:
+            for (_, future), processed_text in zip(batch, processed_texts):
+                if not future.done():
+                    future.set_result(processed_text)
+        finally:
+            self._slots.release()
+
+    async def stop(self) -> None:
+        """Process the waiting texts and stop the executor."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._collector is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.put(_STOP)
+            await self._collector
+            if self._tasks:
+                await asyncio.gather(*self._tasks)
+        self._threads.shutdown()
+        if self._owns_workers:
+            self.fab.stop_workers()
@@ -0,0 +1,110 @@
+"""Compact representation of a tokenized text.
+
+A list of tokens keeps a separate python string for every token, which is
+the bulk of the memory on long documents. `TokenizedText` keeps one string
+and the start and end offsets of the tokens in it, a token is sliced from
+the string only when it is accessed. It behaves as a read-only sequence of
+tokens and is equal to the list of the same tokens, so it can be passed to
+the units that expect the list.
+"""
+from array import array
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple, Union
+
+# The type code of the offsets, C int.
+OFFSET_TYPE = "i"
+
+
+class TokenizedText(Sequence):
+    """The tokens of a text as the offsets in one string.
+
+    Args:
+        text (str): the string the tokens are sliced from.
+        starts (array): the start offsets of the tokens.
+        ends (array): the end offsets of the tokens.
+    """
+
+    __slots__ = ("text", "starts", "ends")
+
+    def __init__(self, text: str, starts: array, ends: array) -> None:
+        if len(starts) != len(ends):
+            raise ValueError("The amount of the start and end offsets differs")
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_spans(cls, text: str, spans: Iterable[Tuple[int, int]]) -> "TokenizedText":
+        """Build from the (start, end) pairs of the tokens in the text."""
+        starts = array(OFFSET_TYPE)
+        ends = array(OFFSET_TYPE)
+        for start, end in spans:
+            starts.append(start)
+            ends.append(end)
+        return cls(text, starts, ends)
+
+    @classmethod
+    def from_tokens(cls, tokens: Iterable[str]) -> "TokenizedText":
+        """Pack the tokens into one string."""
+        tokens = list(tokens)
+        starts = array(OFFSET_TYPE)
+        ends = array(OFFSET_TYPE)
+        end = 0
+        for token in tokens:
+            starts.append(end)
+            end += len(token)
+            ends.append(end)
+        return cls("".join(tokens), starts, ends)
+
+    def take(self, positions: Iterable[int]) -> "TokenizedText":
+        """The tokens at the `positions`, e.g. reordered, sharing the string."""
+        positions = list(positions)
+        starts = array(OFFSET_TYPE, [self.starts[i] for i in positions])
+        ends = array(OFFSET_TYPE, [self.ends[i] for i in positions])
+        return TokenizedText(self.text, starts, ends)
+
+    def tolist(self) -> List[str]:
+        return list(self)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, "TokenizedText"]:
+        if isinstance(index, slice):
+            return TokenizedText(self.text, self.starts[index], self.ends[index])
+        return self.text[self.starts[index]:self.ends[index]]
+
+    def __iter__(self) -> Iterator[str]:
+        text = self.text
+        for start, end in zip(self.starts, self.ends):
+            yield text[start:end]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TokenizedText):
+            if self.text is other.text and self.starts == other.starts and self.ends == other.ends:
+                return True
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self) -> tuple:
+        return TokenizedText, (self.text, self.starts, self.ends)
+
+    def __repr__(self) -> str:
+        return f"TokenizedText({list(self)!r})"
+
+
+def to_builtin(obj: Any) -> Any:
+    """The `default` hook of `json.dumps` writing `TokenizedText` as the list of tokens."""
+    if isinstance(obj, TokenizedText):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def take_tokens(tokens: Sequence[str], positions: Iterable[int]) -> Sequence[str]:
+    """The tokens at the `positions` of the same type as `tokens`."""
+    if isinstance(tokens, TokenizedText):
+        return tokens.take(positions)
+    return [tokens[i] for i in positions]
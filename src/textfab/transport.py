@@ -0,0 +1,99 @@
+"""Transport of the text chunks between the fabric and the worker processes.
+
+By default every text sent to a worker and every result sent back is
+pickled separately and copied through a pipe. With the shared memory
+transport the chunk of strings is packed into one block of shared memory as
+the offsets of the texts followed by their UTF-8 bytes, only the name of the
+block goes through the pipe and the worker decodes the whole chunk right
+from the block at once. The results are sent back the same way. The chunks with other
+objects, e.g. the lists of tokens, are pickled as usual.
+"""
+from array import array
+from itertools import accumulate
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, List, Optional
+
+TRANSPORTS = ("pickle", "shared_memory")
+
+# The type code of the offsets, 8 bytes signed integer.
+OFFSET_TYPE = "q"
+
+
+class SharedTexts:
+    """The chunk of strings packed into a block of shared memory.
+
+    The block starts with `n_texts + 1` offsets of the texts in characters
+    and the size of the data in bytes, followed by the UTF-8 bytes of the
+    joined texts. The lone surrogates, e.g. of the texts read with
+    `errors="surrogateescape"`, are kept. The object itself is small, so it is sent to the other
+    process instead of the texts.
+
+    Args:
+        name (str): name of the shared memory block.
+        n_texts (int): amount of texts in the block.
+    """
+
+    def __init__(self, name: str, n_texts: int) -> None:
+        self.name = name
+        self.n_texts = n_texts
+
+    @classmethod
+    def pack(cls, texts: List[Any]) -> Optional["SharedTexts"]:
+        """Copy the texts to a new block, None if not all of them are strings."""
+        if not all(isinstance(text, str) for text in texts):
+            return None
+        data = "".join(texts).encode("utf-8", "surrogatepass")
+        header = array(OFFSET_TYPE, [0])
+        header.extend(accumulate(map(len, texts)))
+        header.append(len(data))
+        header = header.tobytes()
+        shm = shared_memory.SharedMemory(create=True, size=max(len(header) + len(data), 1))
+        try:
+            shm.buf[:len(header)] = header
+            shm.buf[len(header):len(header) + len(data)] = data
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        shm.close()
+        return cls(shm.name, len(texts))
+
+    def unpack(self, unlink: bool = False) -> List[str]:
+        """Decode the texts of the block.
+
+        Args:
+            unlink (bool): free the block after reading, it is done by the
+                process that receives the texts.
+        """
+        shm = shared_memory.SharedMemory(self.name)
+        try:
+            header = array(OFFSET_TYPE)
+            header_size = (self.n_texts + 2) * header.itemsize
+            header.frombytes(shm.buf[:header_size])
+            offsets, data_size = header[:-1], header[-1]
+            with shm.buf[header_size:header_size + data_size] as data:
+                joined = str(data, "utf-8", "surrogatepass")
+            texts = [joined[start:end] for start, end in zip(offsets, offsets[1:])]
+        finally:
+            shm.close()
+            if unlink:
+                shm.unlink()
+        return texts
+
+    @staticmethod
+    def start_tracking() -> None:
+        """Start the tracker of the shared memory blocks before the workers.
+
+        The workers started after it share it with the main process, so the
+        blocks left after a failure are freed once at the exit.
+        """
+        resource_tracker.ensure_running()
+
+    def unlink(self) -> None:
+        """Free the block without reading it."""
+        try:
+            shm = shared_memory.SharedMemory(self.name)
+        except FileNotFoundError:
+            return
+        shm.close()
+        shm.unlink()
@@ -1,15 +1,40 @@
 import re
-from typing import Any, List
+import os
+import json
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 import unicodedata
 
 from string import punctuation
 
-from .base import ProcessUnit
+from .base import ProcessUnit, is_text_series
 from .base import ParamProcessUnit
 from .base import ChangingProcessUnit
 from .base import ParamChangingProcessUnit
+from .fusion import char_map, ContextSensitiveChar
+from .tokens import TokenizedText
 
-from .augmentations import butter_finger, random_swap, random_deletion, change_char_case
+from .augmentations import (
+    butter_finger_batch,
+    random_swap_batch,
+    random_deletion_batch,
+    change_char_case_batch,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class _regex_substitution:
+    """Units that are a single substitution of `sub_pattern` with `sub_repl`."""
+
+    def process(self, text: str) -> str:
+        return self.sub_pattern.sub(self.sub_repl, text)
+
+    def process_series(self, series: "pd.Series") -> "pd.Series":
+        if not is_text_series(series):
+            return super().process_series(series)
+        return series.str.replace(self.sub_pattern, self.sub_repl, regex=True)
 
 
 class remove_punct(ProcessUnit):
@@ -17,8 +42,18 @@ class remove_punct(ProcessUnit):
     Remove all punctuation that listed in a same named module.
     """
 
+    punct_table = str.maketrans("", "", punctuation)
+
     def process(self, text: str) -> str:
-        return "".join([x for x in text if x not in punctuation])
+        return text.translate(self.punct_table)
+
+    def translate_char(self, char: str) -> str:
+        return "" if char in punctuation else char
+
+    def process_series(self, series: "pd.Series") -> "pd.Series":
+        if not is_text_series(series):
+            return super().process_series(series)
+        return series.str.translate(self.punct_table)
 
     def __str__(self):
         return "remove_punct"
@@ -32,17 +67,25 @@ class swap_enter_to_space(ProcessUnit):
     def process(self, text: str) -> str:
         return text.replace("\n", " ")
 
+    def translate_char(self, char: str) -> str:
+        return " " if char == "\n" else char
+
+    def process_series(self, series: "pd.Series") -> "pd.Series":
+        if not is_text_series(series):
+            return super().process_series(series)
+        return series.str.replace("\n", " ", regex=False)
+
     def __str__(self):
         return "swap_enter_to_space"
 
 
-class collapse_spaces(ProcessUnit):
+class collapse_spaces(_regex_substitution, ProcessUnit):
     """
     Replace multiple spaces to one.
     """
 
-    def process(self, text: str) -> str:
-        return re.sub(r"[ ]{2,}", " ", text)
+    sub_pattern = re.compile(r"[ ]{2,}")
+    sub_repl = " "
 
     def __str__(self):
         return "collapse_spaces"
@@ -53,9 +96,31 @@ class lower_string(ProcessUnit):
     Make any string to low level
     """
 
+    # Arrow lowers the strings by codepoint with its own version of Unicode,
+    # so only the texts of Latin, Greek and Cyrillic letters are lowered by
+    # it. The capital sigma and the dotted I are lowered by python.
+    arrow_unsafe_chars = "[^\x00-\u012f\u0131-\u03a2\u03a4-\u052f]"
+
     def process(self, text: str) -> str:
         return text.lower()
 
+    def translate_char(self, char: str) -> str:
+        # The capital sigma is lowered depending on whether it ends a word.
+        if char == "\u03a3":
+            return None
+        return char.lower()
+
+    def process_series(self, series: "pd.Series") -> "pd.Series":
+        if not is_text_series(series):
+            return super().process_series(series)
+        lowered = series.str.lower()
+        if series.dtype == object or getattr(series.dtype, "storage", None) == "python":
+            return lowered
+        unsafe = series.str.contains(self.arrow_unsafe_chars, regex=True)
+        if unsafe.any():
+            lowered[unsafe] = [text.lower() for text in series[unsafe]]
+        return lowered
+
     def __str__(self):
         return "lower_string"
 
@@ -68,35 +133,42 @@ class strip_string(ProcessUnit):
     def process(self, text: str) -> str:
         return text.strip()
 
+    def process_series(self, series: "pd.Series") -> "pd.Series":
+        if not is_text_series(series):
+            return super().process_series(series)
+        return series.str.strip()
+
     def __str__(self):
         return "strip_string"
 
 
-class remove_latin(ProcessUnit):
+class remove_latin(_regex_substitution, ProcessUnit):
     """
     Remove any latin characters in string
     """
 
-    def process(self, text: str) -> str:
-        return re.sub("[A-Za-z]+", "", text)
+    sub_pattern = re.compile(r"[A-Za-z]+")
+    sub_repl = ""
+    deleted_chars = r"[A-Za-z]"
 
     def __str__(self):
         return "remove_latin"
 
 
-class remove_non_rus_alphabet(ProcessUnit):
+class remove_non_rus_alphabet(_regex_substitution, ProcessUnit):
     """
     Remove any non-cyrillic characters in string
     """
 
-    def process(self, text: str) -> str:
-        return re.sub("[^А-Яа-яё \-\,\.\;\:]+", "", text)
+    sub_pattern = re.compile(r"[^А-Яа-яё \-\,\.\;\:]+")
+    sub_repl = ""
+    deleted_chars = r"[^А-Яа-яё \-\,\.\;\:]"
 
     def __str__(self):
         return "remove_non_rus_alphabet"
 
 
-class remove_custom_regex(ParamProcessUnit):
+class remove_custom_regex(_regex_substitution, ParamProcessUnit):
     """
     Allows to define a custom regex for substitution
 
@@ -104,52 +176,202 @@ class remove_custom_regex(ParamProcessUnit):
         regex (str): The regex string to be removed.
     """
 
-    def process(self, text: str) -> str:
-        print(self.param)
+    sub_repl = ""
+
+    def __init__(self, param) -> None:
+        super().__init__(param)
         if len(self.param) > 1:
             raise ValueError(f"Too many parameters for {self.__str__()} unit")
-        return re.sub(self.param["regex"], "", text)
+        self.sub_pattern = re.compile(self.param["regex"])
 
     def __str__(self):
         return f"remove_custom_regex:{self.param}"
 
 
-class lemmatize_by_mystem(ProcessUnit):
+class lemmatize_by_mystem(ParamProcessUnit):
     """
     Lemmatize all words in the string with pymystem3
+
+    Params:
+        word_cache_size (int, optional): size of the word to lemma cache.
+            With the cache every word is lemmatized once without its context
+            and only the words missing in the cache are sent to mystem. By
+            default the cache is off and the texts are lemmatized with the
+            context-sensitive disambiguation.
+        word_cache_path (str, optional): path to the JSON file to preload
+            the cache from and to save it to with `save_word_cache`.
+
+    The cached mode splits the text into the words by itself: the runs of
+    letters, the hyphenated words like "кто-то" are kept whole as mystem
+    does. The digits and the other symbols are copied as is. The boundaries
+    can still differ from mystem's own tokenization in rare cases, e.g. the
+    words with the apostrophes.
+
+    The workers of a parallel run (`pool_size` or `backend`) fill their own
+    copies of the word cache, they are not merged back. Only the cache of
+    the unit in the main process is saved, so fill it with a serial run.
     """
 
-    def __init__(self) -> None:
+    # Mystem handles one line per request. The lines of a batch are joined
+    # with this separator into one line to be lemmatized in one round-trip.
+    # It has no letters, so mystem copies it to the output as is, and it
+    # ends the sentence, so the lines don't share the context.
+    batch_separator = " . ||| . "
+    # Maximal length of the joined line sent to mystem at once.
+    max_request_chars = 100000
+    # The words as mystem splits them: the letters and the hyphenated words.
+    word_regex = re.compile(r"[^\W\d_]+(?:-[^\W\d_]+)*")
+
+    def __init__(self, param: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(param if param is not None else {})
         from pymystem3 import Mystem
 
         self.stemmer = Mystem()
+        self.word_cache_size = self.param.get("word_cache_size", 0)
+        self.word_cache = OrderedDict()
+        path = self.param.get("word_cache_path")
+        if self.word_cache_size and path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.word_cache.update(json.load(f))
+            while len(self.word_cache) > self.word_cache_size:
+                self.word_cache.popitem(last=False)
 
     def process(self, text: str) -> str:
+        if self.word_cache_size:
+            return self.process_batch([text])[0]
         return "".join(self.stemmer.lemmatize(text))
 
+    def process_batch(self, texts: List[str]) -> List[str]:
+        if self.word_cache_size:
+            return self._lemmatize_by_words(texts)
+        results = [None] * len(texts)
+        request, request_lines = [], []
+        request_chars = 0
+        for i, text in enumerate(texts):
+            lines = text.splitlines()
+            if not lines or not all(self._can_join(line) for line in lines):
+                results[i] = self.process(text)
+                continue
+            text_chars = len(text) + len(lines) * len(self.batch_separator)
+            if request and request_chars + text_chars > self.max_request_chars:
+                self._lemmatize_lines(texts, request, request_lines, results)
+                request, request_lines = [], []
+                request_chars = 0
+            request.extend(lines)
+            request_lines.extend([i] * len(lines))
+            request_chars += text_chars
+        if request:
+            self._lemmatize_lines(texts, request, request_lines, results)
+        return results
+
+    def _can_join(self, line: str) -> bool:
+        return bool(line.strip()) and self.batch_separator.strip(" .") not in line
+
+    def _lemmatize_lines(self, texts: List[str], lines: List[str], text_ids: List[int], results: List[str]) -> None:
+        """Lemmatize the lines of the texts in one round-trip.
+
+        Every line of a text is lemmatized by mystem separately and ends
+        with the new line symbol, so the results of the lines are joined
+        back in the same way.
+        """
+        lemmatized = "".join(self.stemmer.lemmatize(self.batch_separator.join(lines)))
+        if lemmatized.endswith("\n"):
+            lemmatized = lemmatized[:-1]
+        parts = lemmatized.split(self.batch_separator)
+        if len(parts) != len(lines):
+            # Mystem didn't keep the separator, lemmatize the texts one by one.
+            for i in set(text_ids):
+                results[i] = self.process(texts[i])
+            return
+        for i, part in zip(text_ids, parts):
+            results[i] = (results[i] or "") + part + "\n"
+
+    def _lemmatize_by_words(self, texts: List[str]) -> List[str]:
+        """Lemmatize the texts word by word with the cache."""
+        lemmas = {}
+        missing = []
+        for text in texts:
+            for word in self.word_regex.findall(text):
+                if word in lemmas:
+                    continue
+                if word in self.word_cache:
+                    self.word_cache.move_to_end(word)
+                    lemmas[word] = self.word_cache[word]
+                else:
+                    lemmas[word] = None
+                    missing.append(word)
+        for word, lemma in zip(missing, self._lemmatize_words(missing)):
+            lemmas[word] = lemma
+            self.word_cache[word] = lemma
+        while len(self.word_cache) > self.word_cache_size:
+            self.word_cache.popitem(last=False)
+
+        def replace(match):
+            return lemmas[match.group()]
+
+        # Mystem ends every line of the output with the new line symbol.
+        return [
+            "".join(self.word_regex.sub(replace, line) + "\n" for line in text.splitlines())
+            for text in texts
+        ]
+
+    def _lemmatize_words(self, words: List[str]) -> List[str]:
+        """Lemmatize the words without context in as few round-trips as possible."""
+        lemmas = []
+        start = 0
+        while start < len(words):
+            end, request_chars = start, 0
+            while end < len(words) and (end == start or request_chars + len(words[end]) <= self.max_request_chars):
+                request_chars += len(words[end]) + len(self.batch_separator)
+                end += 1
+            part = words[start:end]
+            lemmatized = "".join(self.stemmer.lemmatize(self.batch_separator.join(part)))
+            if lemmatized.endswith("\n"):
+                lemmatized = lemmatized[:-1]
+            part_lemmas = lemmatized.split(self.batch_separator)
+            if len(part_lemmas) != len(part):
+                part_lemmas = ["".join(self.stemmer.lemmatize(word)).rstrip("\n") for word in part]
+            lemmas.extend(part_lemmas)
+            start = end
+        return lemmas
+
+    def save_word_cache(self, path: Optional[str] = None) -> None:
+        """Save the word cache to JSON file.
+
+        The cache is filled by the serial runs only, the workers of a
+        parallel run keep their own copies.
+
+        Args:
+            path (str, optional): path to the file, `word_cache_path` param
+                by default.
+        """
+        path = path or self.param.get("word_cache_path")
+        if path is None:
+            raise ValueError("The path to save the word cache is not set")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.word_cache, f, ensure_ascii=False)
+
     def __str__(self):
         return "lemmatize_by_mystem"
 
 
-class remove_emoji(ProcessUnit):
+class remove_emoji(_regex_substitution, ProcessUnit):
     """
     Remove all emojis from UTF-8
     """
 
-    def __init__(self):
-        self.emoji_pattern = re.compile(
-            "([" "\U00010000-\U0001FFFF" "\U0000200D"  # .* removed
-            # u"\U0001F600-\U0001F64F"  # emoticons
-            # u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-            # u"\U0001F680-\U0001F6FF"  # transport & map symbols
-            # u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            "])",
-            flags=re.UNICODE,
-        )
-
-    def process(self, text: str) -> str:
-
-        return re.sub(self.emoji_pattern, "", text)
+    emoji_pattern = re.compile(
+        "([" "\U00010000-\U0001FFFF" "\U0000200D"  # .* removed
+        # u"\U0001F600-\U0001F64F"  # emoticons
+        # u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+        # u"\U0001F680-\U0001F6FF"  # transport & map symbols
+        # u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+        "])",
+        flags=re.UNICODE,
+    )
+    sub_pattern = emoji_pattern
+    sub_repl = ""
+    deleted_chars = "[" "\U00010000-\U0001FFFF" "\U0000200D" "]"
 
     def __str__(self):
         return "remove_emoji"
@@ -160,43 +382,78 @@ class remove_accents(ProcessUnit):
     Remove accent symbolо́
     """
 
+    def __init__(self) -> None:
+        super().__init__()
+        self.accent_map = char_map([self])
+
     def process(self, text: str) -> str:
-        return "".join(
+        try:
+            return text.translate(self.accent_map)
+        except ContextSensitiveChar:
+            return "".join(
+                c
+                for c in unicodedata.normalize("NFD", text)
+                if unicodedata.category(c) != "Mn"
+            )
+
+    def translate_char(self, char: str) -> str:
+        kept = "".join(
             c
-            for c in unicodedata.normalize("NFD", text)
+            for c in unicodedata.normalize("NFD", char)
             if unicodedata.category(c) != "Mn"
         )
+        # The combining marks that stay in the text are reordered by the
+        # normalization of the whole text, so they can't be mapped alone.
+        if any(unicodedata.combining(c) for c in kept):
+            return None
+        return kept
 
     def __str__(self):
         return "remove_accents"
 
 
-class tokenize_with_emoji(ChangingProcessUnit):
-    """Tokenize text string with socnet specific objects like emoji or emoticons"""
+class tokenize_with_emoji(ParamChangingProcessUnit):
+    """
+    Tokenize text string with socnet specific objects like emoji or emoticons
 
-    def __init__(self) -> None:
-        super().__init__()
-        from .emoji_tokenizer import tokenize
+    Params:
+        offsets (bool, optional): return the tokens as `TokenizedText`, the
+            offsets of the tokens in the text, instead of the list of strings.
+    """
 
-        self.tokenize = tokenize
+    def __init__(self, param: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(param if param is not None else {})
+        from .emoji_tokenizer import tokenize, tokenize_offsets
 
-    def process(self, text: str) -> List[str]:
+        self.tokenize = tokenize_offsets if self.param.get("offsets", False) else tokenize
+
+    def process(self, text: str) -> Sequence[str]:
         return self.tokenize(text)
 
     def __str__(self,):
         return "tokenizer_with_emoji"
 
 
-class tokenize_with_nltk(ChangingProcessUnit):
-    """Tokenize text with nltk.word_tokenize"""
+class tokenize_with_nltk(ParamChangingProcessUnit):
+    """
+    Tokenize text with nltk.word_tokenize
 
-    def __init__(self) -> None:
-        super().__init__()
+    Params:
+        offsets (bool, optional): pack the tokens of the text into one
+            `TokenizedText`. The tokens aren't the substrings of the text,
+            e.g. the quotes are replaced, so they are copied into a new string.
+    """
+
+    def __init__(self, param: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(param if param is not None else {})
         from nltk import word_tokenize
 
         self.tokenize = word_tokenize
+        self.offsets = self.param.get("offsets", False)
 
-    def process(self, text: str) -> List[str]:
+    def process(self, text: str) -> Sequence[str]:
+        if self.offsets:
+            return TokenizedText.from_tokens(self.tokenize(text))
         return self.tokenize(text)
 
     def __str__(self,):
@@ -234,73 +491,122 @@ class segment_by_sentences(ParamChangingProcessUnit):
         return "segment_by_sentences"
 
 
-class remove_links(ProcessUnit):
+class remove_links(_regex_substitution, ProcessUnit):
     """Remove any links from text."""
 
-    def __init__(self) -> None:
-        super().__init__()
-        self.link_regex = re.compile(
-            "(https?://)?([\da-z.-]+).([a-z.]{2,6})([/\w.-?&\-\#]*)"
-        )
-
-    def process(self, text: str) -> str:
-        return self.link_regex.sub("", text)
+    link_regex = re.compile(
+        r"(https?://)?([\da-z.-]+).([a-z.]{2,6})([/\w.-?&\-\#]*)"
+    )
+    sub_pattern = link_regex
+    sub_repl = ""
 
     def __str__(self) -> str:
         return "remove_links"
 
 
-class remove_mobile_phone_numbers(ProcessUnit):
+class remove_mobile_phone_numbers(_regex_substitution, ProcessUnit):
     """Remove mobile phone numbers from text."""
 
-    def __init__(self) -> None:
-        super().__init__()
-        self.phone_number_regex = re.compile(
-            "^\+?[78][-\(]?\d{3}\)?-?\d{3}-?\d{2}-?\d{2}$"
-        )
-
-    def process(self, text: str) -> str:
-        return self.phone_number_regex.sub("", text)
+    phone_number_regex = re.compile(
+        r"^\+?[78][-\(]?\d{3}\)?-?\d{3}-?\d{2}-?\d{2}$"
+    )
+    sub_pattern = phone_number_regex
+    sub_repl = ""
 
     def __str__(self) -> str:
         return "remove_mobile_phone_numbers"
 
 
-class apply_butter_finger(ParamProcessUnit):
-    """Apply the butter fingers augmentation to tokenized text."""
+class _augmentation:
+    """Augmentation units on top of the batched augmentations.
 
-    def process(self, text: List[str]) -> List[str]:
-        return butter_finger(text, **self.param)
+    Every text is augmented with the random numbers keyed by the `seed` param,
+    the index of the text and the position of the unit in the conveyer, so
+    the result is the same however the texts are split between the workers.
+    A unit used by itself numbers the texts of a batch from zero, so the
+    separate `process` calls augment every text as the first one and reuse
+    the same random numbers. Use `process_batch` or `process_indexed_batch`
+    with the indices of the texts to augment them independently.
+    """
+
+    stochastic = True
+    augmentation = None
+
+    def process(self, text: Sequence[str]) -> Sequence[str]:
+        """Augment the text as the text with index 0, every call draws the same random numbers."""
+        return self.process_batch([text])[0]
+
+    def process_batch(self, texts: List[Sequence[str]]) -> List[Sequence[str]]:
+        return self.process_indexed_batch(texts, range(len(texts)), (0,))
+
+    def process_indexed_batch(
+        self, texts: List[Sequence[str]], indices: Sequence[int], key: Tuple[int, ...]
+    ) -> List[Sequence[str]]:
+        return type(self).augmentation(texts, indices=indices, key=key, **self.param)
+
+
+class apply_butter_finger(_augmentation, ParamProcessUnit):
+    """Apply the butter fingers augmentation to tokenized text.
+
+    The separate `process` calls reuse the same random numbers, augment
+    the texts in one batch instead.
+    """
+
+    augmentation = staticmethod(butter_finger_batch)
 
     def __str__(self) -> str:
         return "apply_butter_finger"
 
 
-class apply_random_token_swap(ParamProcessUnit):
-    """Apply the random token swap augmentation to tokenized text."""
+class apply_random_token_swap(_augmentation, ParamProcessUnit):
+    """Apply the random token swap augmentation to tokenized text.
 
-    def process(self, text: List[str]) -> List[str]:
-        return random_swap(text, **self.param)
+    The separate `process` calls reuse the same random numbers, augment
+    the texts in one batch instead.
+    """
+
+    augmentation = staticmethod(random_swap_batch)
 
     def __str__(self) -> str:
         return "apply_random_token_swap"
 
 
-class apply_random_token_deletion(ParamChangingProcessUnit):
-    """Apply the random token deletion augmentation to tokenized text."""
+class apply_random_token_deletion(_augmentation, ParamChangingProcessUnit):
+    """Apply the random token deletion augmentation to tokenized text.
 
-    def process(self, text: List[str]) -> List[str]:
-        return random_deletion(text, **self.param)
+    The separate `process` calls reuse the same random numbers, augment
+    the texts in one batch instead.
+    """
+
+    augmentation = staticmethod(random_deletion_batch)
 
     def __str__(self) -> str:
         return "apply_random_token_deletion"
 
 
-class apply_changing_token_char_case(ParamProcessUnit):
-    """Apply the changing token char case augmentation to tokenized text."""
+class apply_changing_token_char_case(_augmentation, ParamProcessUnit):
+    """Apply the changing token char case augmentation to tokenized text.
+
+    The separate `process` calls reuse the same random numbers, augment
+    the texts in one batch instead.
+    """
 
-    def process(self, text: List[str]) -> List[str]:
-        return change_char_case(text, **self.param)
+    augmentation = staticmethod(change_char_case_batch)
 
     def __str__(self) -> str:
         return "apply_changing_token_char_case"
+
+
+# Registry of the units by their names, used to build the conveyer from config.
+UNITS = {
+    name: obj
+    for name, obj in list(globals().items())
+    if isinstance(obj, type) and issubclass(obj, ProcessUnit) and obj.__module__ == __name__
+}
+
+
+def get_unit(name: str) -> type:
+    """Find the unit class by its name."""
+    if name not in UNITS:
+        raise ValueError(f"Unknown unit {name}, see textfab.utils.show_available_units()")
+    return UNITS[name]
@@ -1,7 +1,6 @@
-from inspect import getmembers, isclass
 from . import units
 
 
 def show_available_units():
-    for name, obj in getmembers(units, isclass)[3:]:
+    for name, obj in sorted(units.UNITS.items()):
         print(name, obj.__doc__)
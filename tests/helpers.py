@@ -0,0 +1,29 @@
+from textfab.base import ChangingProcessUnit
+
+
+class count_calls(ChangingProcessUnit):
+    """Apply a function to the texts counting the calls.
+
+    Args:
+        function (Callable, optional): what is done with a text, by default
+            the text is returned as is.
+        name (str): the name of the unit in the conveyer.
+    """
+
+    def __init__(self, function=None, name="count_calls"):
+        super().__init__()
+        self.function = function
+        self.name = name
+        self.calls = 0
+        self.batch_sizes = []
+
+    def process(self, text):
+        self.calls += 1
+        return text if self.function is None else self.function(text)
+
+    def process_batch(self, texts):
+        self.batch_sizes.append(len(texts))
+        return [self.process(text) for text in texts]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,78 @@
+import pytest
+
+from textfab.fabric import Fabric
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+CONFIG = ["swap_enter_to_space", "remove_punct", "lower_string", "collapse_spaces"]
+TEXTS = ["Привет, Мир!", None, "A  b\nC", ""] * 5
+
+
+def expected(texts):
+    processed = iter(Fabric(CONFIG)([t for t in texts if t is not None]))
+    return [next(processed) if t is not None else None for t in texts]
+
+
+def test_process_arrays():
+    fab = Fabric(CONFIG)
+    result = fab.process_arrow(pa.array(TEXTS))
+    assert isinstance(result, pa.Array)
+    assert result.type == pa.string()
+    assert result.to_pylist() == expected(TEXTS)
+    assert fab.process_arrow(pa.array(TEXTS, type=pa.large_string())).type == pa.large_string()
+    assert fab.process_arrow(pa.array([None, None], type=pa.string())).type == pa.string()
+
+    chunked = pa.chunked_array([TEXTS[:7], TEXTS[7:]])
+    result = fab.process_arrow(chunked, pool_size=2)
+    assert isinstance(result, pa.ChunkedArray)
+    assert result.num_chunks == 2
+    assert result.to_pylist() == expected(TEXTS)
+
+
+def test_process_record_batches():
+    fab = Fabric(CONFIG)
+    table = pa.table({"id": list(range(len(TEXTS))), "text": TEXTS})
+    result = fab.process_arrow(table, "text", "clean")
+    assert result.column_names == ["id", "text", "clean"]
+    assert result.column("text").to_pylist() == TEXTS
+    assert result.column("clean").to_pylist() == expected(TEXTS)
+
+    batch = table.to_batches()[0]
+    result = fab.process_arrow(batch, "text")
+    assert isinstance(result, pa.RecordBatch)
+    assert result.column("text").to_pylist() == expected(TEXTS)
+    with pytest.raises(ValueError):
+        fab.process_arrow(batch, "body")
+
+    digits = Fabric(["lower_string", {"remove_custom_regex": {"regex": "[0-9]+"}}])
+    assert digits.process_arrow(pa.array(["A1", "B22"])).to_pylist() == ["a", "b"]
+
+
+def test_process_empty_record_batches():
+    fab = Fabric(CONFIG)
+    table = pa.table({"id": pa.array([], pa.int64()), "text": pa.array([], pa.string())})
+    assert table.num_columns == 2 and not table.to_batches()
+    for data in [table, pa.RecordBatch.from_pydict(table.to_pydict(), schema=table.schema)]:
+        result = fab.process_arrow(data, "text", "clean")
+        assert type(result) is type(data)
+        assert result.schema.names == ["id", "text", "clean"] and result.num_rows == 0
+        assert result.schema.field("clean").type == pa.string()
+    assert fab.process_arrow(table, "text") is table
+    with pytest.raises(ValueError):
+        fab.process_arrow(table, "body")
+
+
+def test_process_parquet(tmp_path):
+    source = str(tmp_path / "input.parquet")
+    destination = str(tmp_path / "output.parquet")
+    pq.write_table(pa.table({"id": list(range(len(TEXTS))), "text": TEXTS}), source)
+    Fabric(CONFIG).process_parquet(source, destination, "text", "clean", batch_size=3, pool_size=2)
+    result = pq.read_table(destination)
+    assert result.column("id").to_pylist() == list(range(len(TEXTS)))
+    assert result.column("clean").to_pylist() == expected(TEXTS)
+
+    empty = str(tmp_path / "empty.parquet")
+    pq.write_table(pa.table({"text": pa.array([], type=pa.string())}), empty)
+    Fabric(CONFIG).process_parquet(empty, destination, "text", "clean")
+    assert pq.read_table(destination).column_names == ["text", "clean"]
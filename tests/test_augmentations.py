@@ -0,0 +1,152 @@
+from textfab import units
+from textfab.augmentations import (
+    KEY_APPROX,
+    butter_finger,
+    butter_finger_batch,
+    change_char_case,
+    change_char_case_batch,
+    random_deletion,
+    random_deletion_batch,
+    random_swap,
+    random_swap_batch,
+)
+from textfab.fabric import Fabric
+
+from .helpers import count_calls
+
+TEXTS = [
+    ["это", "тестовый", "Набор", "для", "аугментаций"],
+    ["Привет", "МИР", "hello", "123", "!"],
+    [],
+    ["одно"],
+    ["а", "б", "а", "в"],
+] * 20
+
+
+def test_butter_finger_batch():
+    result = butter_finger_batch(TEXTS, prob=0.5, stop_words=["для"], seed=1)
+    assert result == butter_finger_batch(TEXTS, prob=0.5, stop_words=["для"], seed=1)
+    assert result != TEXTS
+    for text, new_text in zip(TEXTS, result):
+        assert [len(w) for w in text] == [len(w) for w in new_text]
+        for word, new_word in zip(text, new_text):
+            if word == "для":
+                assert new_word == word
+            for c, new_c in zip(word, new_word):
+                if c.lower() in KEY_APPROX:
+                    assert new_c.lower() in KEY_APPROX[c.lower()]
+                    assert c.isupper() == new_c.isupper() or not new_c.isalpha()
+                else:
+                    assert c == new_c
+    assert butter_finger_batch(TEXTS, prob=0.5, prob_token_pass=1.0, seed=1) == TEXTS
+
+
+def test_change_char_case_batch():
+    result = change_char_case_batch(TEXTS, prob=0.5, stop_words=["для"], seed=1)
+    assert result == change_char_case_batch(TEXTS, prob=0.5, stop_words=["для"], seed=1)
+    assert result != TEXTS
+    for text, new_text in zip(TEXTS, result):
+        assert [w.lower() for w in text if w.isalpha()] == [w.lower() for w in new_text if w.isalpha()]
+        assert "для" not in text or new_text[text.index("для")] == "для"
+    # the tokens are never passed, the characters without case are dropped
+    assert change_char_case_batch(TEXTS, prob=1.0, prob_token_pass=1.0)[1] == ["пРИВЕТ", "мир", "HELLO", "", ""]
+    assert change_char_case_batch(TEXTS[:2], prob=1.0, try_numbers=2) == [TEXTS[0], ["Привет", "МИР", "hello", "", ""]]
+
+
+def test_random_deletion_batch():
+    result = random_deletion_batch(TEXTS, prob=0.99, seed=1)
+    assert result == random_deletion_batch(TEXTS, prob=0.99, seed=1)
+    for text, new_text in zip(TEXTS, result):
+        if len(text) <= 1:
+            assert new_text == text
+        else:
+            assert len(new_text) == 1 and new_text[0] in text
+    result = random_deletion_batch(TEXTS, prob=0.99, stop_words=[0], seed=1)
+    for text, new_text in zip(TEXTS, result):
+        assert new_text[:1] == text[:1]
+    # the words in the stop words are ignored like in the original implementation
+    assert random_deletion_batch(TEXTS, prob=0.99, stop_words=["для", 0], seed=1) == result
+    assert random_deletion(["a", "b", "c"], prob=0.99, stop_words=["a"], seed=1) == random_deletion(
+        ["a", "b", "c"], prob=0.99, seed=1
+    )
+
+
+def test_random_swap_batch():
+    result = random_swap_batch(TEXTS, try_numbers=3, seed=1)
+    assert result == random_swap_batch(TEXTS, try_numbers=3, seed=1)
+    assert result != TEXTS
+    for text, new_text in zip(TEXTS, result):
+        assert sorted(text) == sorted(new_text)
+    result = random_swap_batch(TEXTS, try_numbers=3, stop_words=["для", "МИР"], seed=1)
+    for text, new_text in zip(TEXTS, result):
+        for word in ["для", "МИР"]:
+            if word in text:
+                assert new_text.index(word) == text.index(word)
+
+
+def test_single_text_functions():
+    for text in TEXTS[:5]:
+        assert butter_finger(text, prob=0.5, seed=3) == butter_finger_batch([text], prob=0.5, seed=3)[0]
+        assert change_char_case(text, prob=0.5, seed=3) == change_char_case_batch([text], prob=0.5, seed=3)[0]
+        assert random_deletion(text, prob=0.9, seed=3) == random_deletion_batch([text], prob=0.9, seed=3)[0]
+        assert random_swap(text, try_numbers=2, seed=3) == random_swap_batch([text], try_numbers=2, seed=3)[0]
+    # the characters without case are dropped like in the original implementation
+    assert change_char_case(["a1!", "ß"], prob=1.0, prob_token_pass=1.0) == ["A", "ß"]
+
+
+def test_batching_independence():
+    result = butter_finger_batch(TEXTS, prob=0.5, seed=3, key=(1,))
+    assert result[:7] == butter_finger_batch(TEXTS[:7], prob=0.5, seed=3, key=(1,))
+    assert result[7:] == butter_finger_batch(TEXTS[7:], prob=0.5, seed=3, indices=range(7, len(TEXTS)), key=(1,))
+    assert result != butter_finger_batch(TEXTS, prob=0.5, seed=3, key=(2,))
+
+    unit = units.apply_butter_finger({"prob": 0.5, "seed": 3})
+    assert unit.process_batch(TEXTS) == butter_finger_batch(TEXTS, prob=0.5, seed=3, key=(0,))
+    assert unit.process(TEXTS[0]) == unit.process_batch(TEXTS)[0]
+
+
+def test_fabric_reproducibility():
+    config = [
+        {"apply_butter_finger": {"prob": 0.3, "seed": 7}},
+        {"apply_changing_token_char_case": {"prob": 0.3, "seed": 7}},
+        {"apply_random_token_swap": {"seed": 7}},
+    ]
+    fab = Fabric(config)
+    expected = fab(TEXTS)
+    assert expected == Fabric(config)(TEXTS)
+    assert expected == fab(TEXTS, pool_size=2)
+    assert expected == fab(TEXTS, pool_size=3)
+    assert expected == list(fab.stream(TEXTS, chunksize=7, pool_size=2, ordered=True))
+
+
+def test_sharding():
+    config = [{"apply_butter_finger": {"prob": 0.3, "seed": 7}}, {"apply_random_token_swap": {"seed": 7}}]
+    fab = Fabric(config)
+    expected = fab(TEXTS)
+    for k in [1, 37]:
+        assert fab(TEXTS[k:], start=k) == expected[k:]
+        assert fab(TEXTS[k:], start=k, pool_size=2, schedule="length") == expected[k:]
+        assert fab(TEXTS[k:], start=k, backend="auto") == expected[k:]
+        assert list(fab.stream(TEXTS[k:], chunksize=7, start=k)) == expected[k:]
+        assert fab.augment(TEXTS[k:], n_variants=2, start=k) == fab.augment(TEXTS, n_variants=2)[k:]
+    assert fab(TEXTS[1:]) != expected[1:]
+
+
+def test_augment():
+    split_words = count_calls(str.split, "split_words")
+    config = [
+        "lower_string",
+        split_words,
+        {"apply_butter_finger": {"prob": 0.3, "seed": 7}},
+        {"apply_random_token_swap": {"seed": 7}},
+    ]
+    texts = [" ".join(text) for text in TEXTS]
+    fab = Fabric(config)
+    variants = fab.augment(texts, n_variants=4)
+    assert split_words.calls == len(texts)
+    assert len(variants) == len(texts)
+    assert all(len(v) == 4 for v in variants)
+    assert [v[0] for v in variants] == fab(texts)
+    assert variants[0][1] != variants[0][2]
+    assert variants == fab.augment(texts, n_variants=4, pool_size=2)
+    assert Fabric(["lower_string"]).augment(["A", "B"], n_variants=2) == [["a", "a"], ["b", "b"]]
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from textfab import backends
+from textfab.backends import Calibration
+from textfab.base import ProcessUnit
+from textfab.fabric import Fabric
+
+CONFIG = ["swap_enter_to_space", "remove_punct", "lower_string", "collapse_spaces"]
+TEXTS = ["Привет, Мир!\n\nТест  тест.", "A b  C", "", "Ещё один\nтекст, для теста"] * 50
+
+
+class wait_on_io(ProcessUnit):
+    def process(self, text):
+        time.sleep(0.001)
+        return text
+
+    def __str__(self):
+        return "wait_on_io"
+
+
+def test_backends():
+    expected = Fabric(CONFIG)(TEXTS)
+    fab = Fabric(CONFIG)
+    for backend in ["serial", "thread", "process", "spawn"]:
+        assert fab(TEXTS, pool_size=2, backend=backend) == expected
+    assert list(fab.stream(TEXTS, pool_size=2, chunksize=7, backend="thread")) == expected
+    with fab.start_workers(2, backend="thread"):
+        assert fab(TEXTS) == expected
+    with pytest.raises(ValueError):
+        fab(TEXTS, backend="gpu")
+    with pytest.raises(ValueError):
+        fab.start_workers(2, backend="auto")
+
+
+def test_thread_workers_own_conveyer():
+    tokens = [text.split() for text in TEXTS]
+    fab = Fabric([{"apply_butter_finger": {"prob": 0.3, "seed": 1}}])
+    assert fab(tokens, pool_size=3, backend="thread") == fab(tokens)
+
+
+def test_calibration_choice(monkeypatch):
+    monkeypatch.setattr(backends, "gil_enabled", lambda: True)
+    assert Calibration(1e-6, 1.0).choose(1000, 8) == ("serial", None)
+    assert Calibration(1e-3, 1.0).choose(100000, 8) == ("process", 8)
+    assert Calibration(1e-3, 0.1).choose(100000, 8) == ("thread", 8)
+    assert Calibration(1e-3, 1.0).choose(1000, 8) == ("process", 4)
+    assert Calibration(1e-3, 1.0).choose(None, 8) == ("process", 8)
+    assert Calibration(1e-3, 1.0).choose(100000, 1) == ("serial", None)
+    monkeypatch.setattr(backends, "gil_enabled", lambda: False)
+    assert Calibration(1e-3, 1.0).choose(100000, 8) == ("thread", 8)
+
+
+def test_auto_backend():
+    fab = Fabric(CONFIG)
+    assert fab(TEXTS, backend="auto") == Fabric(CONFIG)(TEXTS)
+    assert fab.last_backend == ("serial", None)
+
+    fab = Fabric(CONFIG + [wait_on_io()])
+    assert fab(TEXTS * 5, pool_size=4, backend="auto") == Fabric(CONFIG)(TEXTS * 5)
+    assert fab.last_backend[0] == "thread"
+    assert 2 <= fab.last_backend[1] <= 4
+    assert list(fab.stream(TEXTS * 5, pool_size=4, chunksize=100, backend="auto")) == Fabric(CONFIG)(TEXTS * 5)
+    assert fab.last_backend == ("thread", 4)
+
+
+def test_split_by_cost():
+    from textfab.fabric import _split_by_cost
+
+    costs = [1] * 100 + [500, 3, 1000] + [2] * 50
+    chunks = _split_by_cost(costs, 4)
+    assert sorted(i for chunk in chunks for i in chunk) == list(range(len(costs)))
+    assert chunks[0] == [102]
+    assert chunks[1] == [100]
+    chunk_costs = [sum(costs[i] for i in chunk) for chunk in chunks]
+    assert max(chunk_costs[2:]) <= chunk_costs[1]
+
+
+def test_length_schedule():
+    texts = TEXTS + ["Длинный, текст!\n" * 500] * 3
+    expected = Fabric(CONFIG)(texts)
+    fab = Fabric(CONFIG)
+    assert fab(texts, pool_size=2, schedule="length") == expected
+    assert fab(texts, pool_size=2, backend="thread", schedule=lambda text: len(text) ** 2) == expected
+    with fab.start_workers(2):
+        assert fab(texts, schedule="length") == expected
+    assert fab(texts, schedule="length") == expected
+    with pytest.raises(ValueError):
+        fab(texts, pool_size=2, schedule="size")
+
+    tokens = [text.split() for text in texts]
+    augmenter = Fabric([{"apply_butter_finger": {"prob": 0.3, "seed": 1}}])
+    assert augmenter(tokens, pool_size=3, schedule="length") == augmenter(tokens)
+    assert augmenter.augment(tokens, 2, pool_size=3, schedule="length") == augmenter.augment(tokens, 2)
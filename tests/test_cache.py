@@ -0,0 +1,60 @@
+from textfab.cache import LRUCache, TextCache
+from textfab.fabric import Fabric
+
+from .helpers import count_calls
+
+
+def test_lru_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set_many({"a": 1, "b": 2})
+    cache.get_many(["a"])
+    cache.set_many({"c": 3})
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+
+
+def test_fabric_cache(tmp_path):
+    count_texts = count_calls()
+    path = str(tmp_path / "cache.sqlite")
+    conv = Fabric(["remove_punct", count_texts], cache=TextCache(path=path))
+    assert conv(["a, b", "c."]) == ["a b", "c"]
+    assert conv(["c.", "d!"]) == ["c", "d"]
+    assert count_texts.calls == 3
+
+    conv = Fabric(["remove_punct", count_texts], cache=TextCache(path=path))
+    assert list(conv.stream(["a, b", "d!", "e?"], chunksize=2)) == ["a b", "d", "e"]
+    assert count_texts.calls == 4
+
+
+def test_cached_results_are_copies(tmp_path):
+    conv = Fabric(["tokenize_with_emoji"], cache=TextCache(path=str(tmp_path / "cache.sqlite")))
+    first = conv(["a b"])
+    first[0].append("X")
+    result = conv(["a b", "a b"])
+    assert result == [["a", "b"], ["a", "b"]]
+    result[0].append("X")
+    assert result[1] == ["a", "b"] and conv(["a b"]) == [["a", "b"]]
+
+
+def test_unserializable_results_stay_in_memory(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = TextCache(path=path)
+    conv = Fabric([count_calls(frozenset, "to_set")], cache=cache)
+    assert conv(["ab", "ba"]) == [frozenset("ab"), frozenset("ab")]
+    assert len(cache.memory) == 2
+    assert TextCache(path=path).get_many(list(cache.memory._data)) == {}
+
+
+def test_fingerprint():
+    assert Fabric(["remove_punct"]).fingerprint() == Fabric(["remove_punct"]).fingerprint()
+    assert Fabric(["remove_punct"]).fingerprint() != Fabric(["lower_string"]).fingerprint()
+    assert (
+        Fabric([{"remove_custom_regex": {"regex": "a"}}]).fingerprint()
+        != Fabric([{"remove_custom_regex": {"regex": "b"}}]).fingerprint()
+    )
+
+
+def test_stochastic_units_are_not_cached():
+    cache = TextCache()
+    conv = Fabric([{"apply_random_token_swap": {}}], cache=cache)
+    conv([["a", "b", "c"]])
+    assert len(cache.memory) == 0
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from textfab.base import ProcessUnit
+from textfab.cli import main
+
+CONFIG = """- swap_enter_to_space
+- remove_punct
+- collapse_spaces
+"""
+
+
+def test_jsonl(tmp_path):
+    config = tmp_path / "config.yaml"
+    config.write_text(CONFIG)
+    source = tmp_path / "input.jsonl"
+    records = [{"id": i, "text": f"Text, number\n\n {i}"} for i in range(5)]
+    source.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+    output = tmp_path / "output.jsonl"
+    main([str(config), str(source), str(output), "--chunksize", "2"])
+    result = [json.loads(line) for line in output.read_text().splitlines()]
+    assert result == [{"id": i, "text": f"Text number {i}"} for i in range(5)]
+
+
+def test_csv(tmp_path):
+    config = tmp_path / "config.yaml"
+    config.write_text(CONFIG)
+    source = tmp_path / "input.csv"
+    source.write_text('label,body\n1,"Text, one"\n0,"Text,\n two"\n', encoding="utf-8")
+    output = tmp_path / "output.csv"
+    main([str(config), str(source), str(output), "--field", "body",
+          "--output-field", "clean", "--pool-size", "2"])
+    assert output.read_text(encoding="utf-8").splitlines() == [
+        "label,body,clean",
+        "1,\"Text, one\",Text one",
+        "0,\"Text,",
+        " two\",Text two",
+    ]
+
+
+def test_txt(tmp_path):
+    config = tmp_path / "config.yaml"
+    config.write_text(CONFIG)
+    source = tmp_path / "input.txt"
+    source.write_text("Text,  one\nText two!\n", encoding="utf-8")
+    output = tmp_path / "output.txt"
+    main([str(config), str(source), str(output)])
+    assert output.read_text(encoding="utf-8") == "Text one\nText two\n"
+
+
+def test_parquet(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    config = tmp_path / "config.yaml"
+    config.write_text(CONFIG)
+    source = tmp_path / "input.parquet"
+    pq.write_table(pa.table({"id": [1, 2, 3], "body": ["Text, one", None, "Text,\n two"]}), source)
+    output = tmp_path / "output.parquet"
+    main([str(config), str(source), str(output), "--field", "body",
+          "--output-field", "clean", "--chunksize", "2"])
+    assert pq.read_table(output).to_pydict() == {
+        "id": [1, 2, 3],
+        "body": ["Text, one", None, "Text,\n two"],
+        "clean": ["Text one", None, "Text two"],
+    }
+
+
+class add_line_break(ProcessUnit):
+    def process(self, text):
+        return text + "\n"
+
+    def __str__(self):
+        return "add_line_break"
+
+
+def test_txt_escapes_line_breaks(tmp_path):
+    config = tmp_path / "config.yaml"
+    config.write_text("- tests.test_cli.add_line_break\n")
+    source = tmp_path / "input.txt"
+    source.write_text("one\\two\nthree\n", encoding="utf-8")
+    output = tmp_path / "output.txt"
+    main([str(config), str(source), str(output)])
+    assert output.read_text(encoding="utf-8").splitlines() == ["one\\two\\n", "three\\n"]
+    # the rerun with a config that keeps the texts doesn't change the file
+    config.write_text("- collapse_spaces\n")
+    rerun = tmp_path / "rerun.txt"
+    main([str(config), str(output), str(rerun)])
+    assert rerun.read_text(encoding="utf-8") == output.read_text(encoding="utf-8")
+
+
+def test_same_input_and_output(tmp_path, capsys):
+    config = tmp_path / "config.yaml"
+    config.write_text(CONFIG)
+    source = tmp_path / "input.txt"
+    source.write_text("a, b\n", encoding="utf-8")
+    with pytest.raises(SystemExit):
+        main([str(config), str(source), str(tmp_path / "." / "input.txt")])
+    assert "the output file is the input one" in capsys.readouterr().err
+    assert source.read_text(encoding="utf-8") == "a, b\n"
+
+
+def test_missing_field(tmp_path, capsys):
+    config = tmp_path / "config.yaml"
+    config.write_text(CONFIG)
+    source = tmp_path / "input.jsonl"
+    source.write_text('{"text": "a"}\n{"body": "b"}\n', encoding="utf-8")
+    with pytest.raises(SystemExit):
+        main([str(config), str(source), str(tmp_path / "output.jsonl")])
+    assert "record 2 has no field text" in capsys.readouterr().err
+    source = tmp_path / "input.csv"
+    source.write_text("id,text\n1,a\n2\n", encoding="utf-8")
+    with pytest.raises(SystemExit):
+        main([str(config), str(source), str(tmp_path / "output.csv")])
+    assert "record 2 has no column text" in capsys.readouterr().err
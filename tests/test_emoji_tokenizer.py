@@ -0,0 +1,79 @@
+import random
+import re
+
+from textfab.emoji_tokenizer import SYMBOLS, tokenize, tokenize_offsets
+
+
+def _legacy_pattern():
+    """The pattern of the original DeepMoji tokenizer.
+
+    The inline "(?i)" flags of the titles made the whole pattern case
+    insensitive before Python 3.11, here it is the re.IGNORECASE flag.
+    """
+    word = r"[a-zA-Zа-яА-Я]+"
+    symbol = r"|".join([re.escape(s) + r"+" for s in SYMBOLS])
+    symbol += r"|#+(?=#[a-zA-Z0-9_]+)|@+(?=@[a-zA-Z0-9_]+)|#+|@+"
+    emoticon = r"|".join([re.escape(s) for s in ["-_-", "x_x", "^_^", "o.o", "o_o", "(:", "):", ");", "(;"]])
+    for s in [">:", ":", "=", ";"]:
+        for m in ["-", ",", "^", "'", '"']:
+            for e in ["D", "d", "p", "P", "v", ")", "o", "O", "(", "3", "/", "|", "\\"]:
+                emoticon += "|{0}{1}?{2}+".format(re.escape(s), re.escape(m), re.escape(e))
+    tokens = [
+        r"(?:https?://|www\.)(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+",
+        r"\b[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+\b",
+        fr"{word}[-_]{word}",
+        r"#[a-zA-Z0-9_а-яА-Я]+",
+        r"@[a-zA-Z0-9_а-яА-Я]+",
+        r"(?:<+/?3+)+",
+        emoticon,
+        fr"{word}\'{word}",
+        r"Mr\.|Ms\.|Mrs\.|Dr\.|Prof\.",
+        r"\b(?<!\.)(?:[A-Za-z]\.){2,}",
+        r"[0-9]+",
+        word,
+        symbol,
+        r"""\ud83c[\udf00-\udfff]|\ud83d[\udc00-\ude4f\ude80-\udeff]|[☀-⛿✀-➿]""",
+        r".",
+    ]
+    return re.compile(r"\s+|(" + r"|".join(tokens) + r")", re.UNICODE | re.IGNORECASE)
+
+
+LEGACY_PATTERN = _legacy_pattern()
+
+ALPHABET = (
+    list("aAbzZxXoOdDpPvVhtswmrMRфяЯёЁ019_")
+    + list(SYMBOLS)
+    + list("#@ \n\t\x1c\xa0 ")
+    + ["😀", "\ud83d", "\ude00", "☀", "ſ", "K", "İ", "ß"]
+)
+FRAGMENTS = [
+    "http://", "HTTPS://", "www.", "Mr.", "mrs.", "PROF.", "dr.", "x_x", "O.o", "o_O", "<3", "<</33",
+    ":-)", ">:(", ";^P", '="D', ":DDd", "-_-", "^_^", "(:", ");", "user@mail.com", "a.b.c.", "U.S.A.",
+    "red-haired", "don't", "##tag", "@@user", "#хэштег", "%2F", "1+2@x.y", "слово", "Word", "  ",
+]
+
+
+def _corpus(size, seed):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(size):
+        pieces = [
+            rng.choice(FRAGMENTS) if rng.random() < 0.3 else rng.choice(ALPHABET)
+            for _ in range(rng.randint(0, 40))
+        ]
+        texts.append("".join(pieces))
+    return texts
+
+
+def test_tokenize_matches_legacy_pattern():
+    for text in _corpus(30000, 0):
+        expected = [t for t in LEGACY_PATTERN.findall(text) if t.strip()]
+        assert tokenize(text) == expected, text
+        assert tokenize_offsets(text) == expected, text
+
+
+def test_tokenize():
+    assert tokenize("Mr. Smith, RED-haired don't :-)) x_x <3 #tag @user www.site.ru U.S.A. 42😀") == [
+        "Mr.", "Smith", ",", "RED-haired", "don't", ":-))", "x_x", "<3", "#tag", "@user", "www.site.ru",
+        "U.S.A.", "42", "😀",
+    ]
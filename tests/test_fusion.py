@@ -0,0 +1,104 @@
+import itertools
+import random
+import unicodedata
+
+from textfab import units
+from textfab.fabric import Fabric
+from textfab.fusion import fused_char_units, fused_regex_units, plan_conveyer
+
+REGEX_UNITS = [
+    "remove_latin",
+    "remove_non_rus_alphabet",
+    "collapse_spaces",
+    "remove_emoji",
+    "remove_links",
+    "remove_mobile_phone_numbers",
+    {"remove_custom_regex": {"regex": "[0-9]+"}},
+]
+
+CHAR_UNITS = ["remove_punct", "swap_enter_to_space", "lower_string", "remove_accents"]
+
+PIECES = [
+    "привет", "Мир", "ёлка", "hello", "World", " ", "  ", "   ", "\n", ",", ".",
+    "-", ";", ":", "!", "?", "😀", "👍🏻", "‍", "123", "+7-910-221-22-22",
+    "89103123167", "https://github.com/Astromis/textfab", "www.google.com",
+    "a.b", "é", "#тег", "@user", "Модерниза́ция", "ΟΔΟΣ", "Σ", "İ", "ß",
+    "e\u0301", "\u0301", "한국", "\U0001D15F", "\u0915\u093c\u093f",
+]
+
+
+def make_corpus(size: int = 300, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 25)))
+        for _ in range(size)
+    ]
+
+
+def run_sequentially(config: list, texts: list) -> list:
+    conveyer = Fabric(config, fuse_units=False).conveyer
+    result = []
+    for text in texts:
+        for u in conveyer:
+            text = u.process(text)
+        result.append(text)
+    return result
+
+
+def test_fused_equals_sequential():
+    texts = make_corpus()
+    for config in itertools.permutations(REGEX_UNITS, 3):
+        config = list(config)
+        assert Fabric(config)(texts) == run_sequentially(config, texts), config
+    assert Fabric(REGEX_UNITS)(texts) == run_sequentially(REGEX_UNITS, texts)
+
+
+def test_deletions_are_merged():
+    conveyer = [units.remove_latin(), units.remove_emoji(), units.collapse_spaces()]
+    plan = plan_conveyer(conveyer)
+    assert len(plan) == 1 and isinstance(plan[0], fused_regex_units)
+    assert len(plan[0].passes) == 2
+
+
+def test_plan_keeps_other_units():
+    conveyer = [units.remove_punct(), units.remove_latin(), units.lower_string()]
+    assert plan_conveyer(conveyer) == conveyer
+
+
+def test_overridden_process_is_not_fused():
+    class remove_latin_words(units.remove_latin):
+        def process(self, text):
+            return " ".join(w for w in text.split(" ") if not w.isascii())
+
+    class remove_commas(units.remove_punct):
+        def process(self, text):
+            return text.replace(",", "")
+
+    conveyer = [remove_latin_words(), units.remove_emoji(), remove_commas(), units.lower_string()]
+    assert plan_conveyer(conveyer) == conveyer
+    assert Fabric(conveyer)(["Привет, hello 😀!"]) == ["привет !"]
+
+
+def test_fused_chars_equal_sequential():
+    texts = make_corpus()
+    for n in range(2, len(CHAR_UNITS) + 1):
+        for config in itertools.permutations(CHAR_UNITS, n):
+            config = list(config)
+            assert Fabric(config)(texts) == run_sequentially(config, texts), config
+
+
+def test_chars_are_merged():
+    conveyer = [units.swap_enter_to_space(), units.remove_punct(), units.lower_string()]
+    plan = plan_conveyer(conveyer)
+    assert len(plan) == 1 and isinstance(plan[0], fused_char_units)
+    assert plan[0].process("ΟΔΟΣ,\nΣ!") == "οδος σ"
+
+
+def test_remove_accents_map():
+    unit = units.remove_accents()
+    for text in make_corpus():
+        assert unit.process(text) == "".join(
+            c
+            for c in unicodedata.normalize("NFD", text)
+            if unicodedata.category(c) != "Mn"
+        )
@@ -0,0 +1,82 @@
+import pandas as pd
+
+from textfab.fabric import Fabric
+from textfab.graph import FabricGraph
+
+from .helpers import count_calls
+
+TEXTS = ["Привет, Мир!\n\nТест  тест.", "A b  C", "", "Ещё один\nтекст, для теста"] * 5
+
+CONFIGS = {
+    "clean": ["swap_enter_to_space", "remove_punct", "lower_string", "collapse_spaces"],
+    "lower": ["swap_enter_to_space", "remove_punct", "lower_string"],
+    "raw": ["swap_enter_to_space", "collapse_spaces"],
+    "same_raw": ["swap_enter_to_space", "collapse_spaces"],
+    "latin": ["remove_latin"],
+}
+
+
+def test_graph_matches_fabrics():
+    graph = FabricGraph(CONFIGS)
+    result = graph(TEXTS)
+    assert set(result) == set(CONFIGS)
+    for name, config in CONFIGS.items():
+        assert result[name] == Fabric(config)(TEXTS)
+    assert result == graph(TEXTS, pool_size=2)
+    assert result == FabricGraph(CONFIGS, fuse_units=False)(TEXTS)
+
+
+def test_graph_shares_prefix():
+    split = count_calls(str.split, "split_words")
+    configs = {
+        "typos": ["lower_string", split, {"apply_butter_finger": {"prob": 0.3, "seed": 1}}],
+        "swaps": ["lower_string", split, {"apply_random_token_swap": {"seed": 1}}],
+        "tokens": ["lower_string", split],
+    }
+    graph = FabricGraph(configs)
+    result = graph(TEXTS)
+    assert split.calls == len(TEXTS)
+    for name, config in configs.items():
+        assert result[name] == Fabric(config)(TEXTS)
+    assert str(graph) == (
+        "Fabric graph:\n"
+        "lower_string->split_words => tokens\n"
+        "  apply_butter_finger => typos\n"
+        "  apply_random_token_swap => swaps\n"
+    )
+
+
+def test_graph_series():
+    series = pd.Series(TEXTS, index=range(100, 100 + len(TEXTS)))
+    frame = FabricGraph(CONFIGS)(series)
+    assert list(frame.columns) == list(CONFIGS)
+    assert list(frame.index) == list(series.index)
+    assert frame["clean"].to_list() == Fabric(CONFIGS["clean"])(TEXTS)
+
+
+def test_graph_copies_shared_texts():
+    from textfab.base import ChangingProcessUnit
+
+    class upper_inplace(ChangingProcessUnit):
+        def process(self, text):
+            text[:] = [word.upper() for word in text]
+            return text
+
+        def __str__(self):
+            return "upper_inplace"
+
+    split = count_calls(str.split, "split_words")
+    configs = {"tokens": [split], "upper": [split, upper_inplace()], "more": [split, "detokenize_with_space"]}
+    result = FabricGraph(configs)(["a b", "c"])
+    assert result == {"tokens": [["a", "b"], ["c"]], "upper": [["A", "B"], ["C"]], "more": ["a b", "c"]}
+
+
+def test_graph_backends():
+    graph = FabricGraph(CONFIGS)
+    expected = graph(TEXTS)
+    assert graph(TEXTS, pool_size=2, backend="thread") == expected
+    assert graph(TEXTS, backend="auto") == expected
+    with graph.start_workers(2):
+        assert graph(TEXTS) == expected
+        assert graph._pool is not None
+    assert graph._pool is None
@@ -0,0 +1,52 @@
+import pandas as pd
+
+from textfab.fabric import Fabric
+
+from .helpers import count_calls
+from .test_fusion import CHAR_UNITS, REGEX_UNITS, make_corpus
+
+CONFIGS = [
+    REGEX_UNITS,
+    CHAR_UNITS,
+    ["swap_enter_to_space", "remove_links", "remove_emoji", "remove_punct", "lower_string", "collapse_spaces", "strip_string"],
+    ["remove_accents", "remove_non_rus_alphabet", "strip_string"],
+]
+
+
+def test_process_series():
+    texts = make_corpus()
+    series = pd.Series(texts, index=[f"id{i}" for i in range(len(texts))], name="text")
+    for config in CONFIGS:
+        for fuse_units in [True, False]:
+            fab = Fabric(config, fuse_units=fuse_units)
+            result = fab.process_series(series)
+            assert isinstance(result, pd.Series)
+            assert result.name == "text"
+            assert list(result.index) == list(series.index)
+            assert result.to_list() == fab(texts)
+
+
+def test_process_series_fallback():
+    config = [
+        "lower_string",
+        count_calls(str.split, "split_words"),
+        {"apply_butter_finger": {"prob": 0.3, "seed": 1}},
+        "detokenize_with_space",
+        "collapse_spaces",
+    ]
+    texts = ["Привет, Мир", "ещё  один текст", ""] * 10
+    series = pd.Series(texts, index=range(10, 40))
+    fab = Fabric(config)
+    result = fab.process_series(series)
+    assert list(result.index) == list(series.index)
+    assert result.to_list() == fab(texts)
+
+
+def test_process_frame():
+    frame = pd.DataFrame({"title": ["A  B", "C\nD"], "body": ["E,  F", "G"], "label": [1, 0]}, index=[3, 5])
+    fab = Fabric(["swap_enter_to_space", "remove_punct", "lower_string", "collapse_spaces"])
+    result = fab.process_frame(frame, ["title", "body"])
+    assert result.to_dict("list") == {"title": ["a b", "c d"], "body": ["e f", "g"], "label": [1, 0]}
+    assert list(result.index) == [3, 5]
+    assert frame["title"].to_list() == ["A  B", "C\nD"]
+    assert fab.process_frame(frame, "body")["title"].to_list() == ["A  B", "C\nD"]
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from textfab.base import ProcessUnit
+from textfab.fabric import Fabric
+
+from .helpers import count_calls
+
+CONFIG = ["swap_enter_to_space", "remove_punct", "lower_string", "collapse_spaces"]
+TEXTS = ["Привет, Мир!\n\nТест  тест.", "A b  C", "", "Ещё один\nтекст, для теста"] * 25
+
+
+def test_aprocess():
+    counter = count_calls()
+    fab = Fabric(CONFIG + [counter])
+
+    async def serve():
+        fab.start_batcher(max_batch_size=16, max_wait=0.05, max_queue_size=8)
+        results = await asyncio.gather(*(fab.aprocess(text) for text in TEXTS))
+        await fab.stop_batcher()
+        return results
+
+    assert asyncio.run(serve()) == Fabric(CONFIG)(TEXTS)
+    assert sum(counter.batch_sizes) == len(TEXTS)
+    assert max(counter.batch_sizes) <= 16
+    assert len(counter.batch_sizes) < len(TEXTS)
+
+
+def test_aprocess_process_executor():
+    fab = Fabric(CONFIG)
+
+    async def serve():
+        fab.start_batcher(max_batch_size=8, executor="process", workers=2)
+        results = await asyncio.gather(*(fab.aprocess(text) for text in TEXTS))
+        await fab.stop_batcher()
+        return results
+
+    assert asyncio.run(serve()) == Fabric(CONFIG)(TEXTS)
+    assert fab._pool is None
+
+
+def test_aprocess_thread_workers():
+    fab = Fabric(CONFIG)
+
+    async def serve():
+        fab.start_batcher(max_batch_size=8, executor="thread", workers=2)
+        # every thread has its own conveyer in the thread backend
+        assert fab._pool_backend == "thread"
+        results = await asyncio.gather(*(fab.aprocess(text) for text in TEXTS))
+        await fab.stop_batcher()
+        return results
+
+    assert asyncio.run(serve()) == Fabric(CONFIG)(TEXTS)
+    assert fab._pool is None
+
+
+def test_aprocess_error():
+    class fail_on_empty(ProcessUnit):
+        def process(self, text):
+            if not text:
+                raise KeyError("empty")
+            return text
+
+        def __str__(self):
+            return "fail_on_empty"
+
+    fab = Fabric([fail_on_empty()])
+
+    async def serve():
+        fab.start_batcher(max_batch_size=2, max_wait=0.05)
+        results = await asyncio.gather(
+            fab.aprocess("a"), fab.aprocess(""), fab.aprocess("b"), fab.aprocess("c"), return_exceptions=True
+        )
+        await fab.stop_batcher()
+        return results
+
+    results = asyncio.run(serve())
+    assert isinstance(results[1], KeyError)
+    assert results[:1] + results[2:] == ["a", "b", "c"]
+    with pytest.raises(ValueError):
+        Fabric(CONFIG).start_batcher(executor="gpu")
@@ -0,0 +1,108 @@
+import json
+import pickle
+
+import pytest
+
+from textfab import units
+from textfab.augmentations import (
+    butter_finger_batch,
+    change_char_case_batch,
+    random_deletion_batch,
+    random_swap_batch,
+)
+from textfab.cache import TextCache
+from textfab.cli import main
+from textfab.fabric import Fabric
+from textfab.tokens import TokenizedText
+
+TEXTS = [
+    ["это", "тестовый", "Набор", "для", "аугментаций"],
+    ["Привет", "МИР", "hello", "123", "!"],
+    [],
+    ["одно"],
+    ["а", "б", "а", "в"],
+] * 20
+
+
+def _with_spaces(tokens):
+    """The tokens as the offsets in the string with spaces between them."""
+    spans, position = [], 1
+    for token in tokens:
+        spans.append((position, position + len(token)))
+        position += len(token) + 2
+    return TokenizedText.from_spans(" " + "  ".join(tokens) + " ", spans)
+
+
+def test_tokenized_text():
+    tokens = _with_spaces(["Привет", "мир", "!"])
+    assert tokens == ["Привет", "мир", "!"]
+    assert tokens == TokenizedText.from_tokens(["Привет", "мир", "!"])
+    assert tokens != ["Привет", "мир"]
+    assert len(tokens) == 3 and tokens[1] == "мир" and tokens[-1] == "!"
+    assert isinstance(tokens[1:], TokenizedText) and tokens[1:] == ["мир", "!"]
+    assert tokens.take([2, 0]) == ["!", "Привет"] and tokens.take([2, 0]).text is tokens.text
+    assert "мир" in tokens and tokens.index("!") == 2
+    assert " ".join(tokens) == "Привет мир !"
+    assert pickle.loads(pickle.dumps(tokens)) == tokens
+    assert tokens.tolist() == ["Привет", "мир", "!"]
+
+
+def test_augmentations_keep_offsets():
+    compact = [_with_spaces(text) for text in TEXTS]
+    for augmentation, param in [
+        (butter_finger_batch, {"prob": 0.5, "seed": 1}),
+        (change_char_case_batch, {"prob": 0.5, "seed": 1}),
+        (random_deletion_batch, {"prob": 0.99, "seed": 1}),
+        (random_swap_batch, {"try_numbers": 3, "stop_words": ["для"], "seed": 1}),
+    ]:
+        result = augmentation(compact, **param)
+        assert result == augmentation(TEXTS, **param)
+        assert all(isinstance(text, TokenizedText) for text in result)
+
+
+def test_fabric_with_offsets():
+    conf = [
+        {"tokenize_with_emoji": {"offsets": True}},
+        {"apply_random_token_swap": {"try_numbers": 2, "seed": 1}},
+        "detokenize_with_space",
+    ]
+    texts = ["Привет, мир! 😀 Как дела?", "", "one two  three"] * 10
+    expected = Fabric([units.tokenize_with_emoji(), conf[1], conf[2]])(texts)
+    assert Fabric(conf)(texts) == expected
+    assert Fabric(conf)(texts, pool_size=2) == expected
+    assert units.tokenize_with_emoji({"offsets": True}).process("Привет!😀 Как дела?") == [
+        "Привет",
+        "!",
+        "😀",
+        "Как",
+        "дела",
+        "?",
+    ]
+
+
+def test_cache_keeps_offsets(tmp_path):
+    conf = [{"tokenize_with_emoji": {"offsets": True}}]
+    path = str(tmp_path / "cache.sqlite")
+    processed = Fabric(conf, cache=TextCache(path=path))(["a b", "c"])
+    for cached in [Fabric(conf, cache=TextCache(path=path))(["a b", "c"]), Fabric(conf)(["a b", "c"])]:
+        assert cached == processed == [["a", "b"], ["c"]]
+        assert all(isinstance(text, TokenizedText) for text in cached)
+
+
+def test_cli_writes_offsets_as_lists(tmp_path):
+    config = tmp_path / "config.yaml"
+    config.write_text("- tokenize_with_emoji:\n    offsets: true\n")
+    source = tmp_path / "input.jsonl"
+    source.write_text('{"text": "Привет, мир!"}\n', encoding="utf-8")
+    main([str(config), str(source), str(tmp_path / "output.jsonl")])
+    result = json.loads((tmp_path / "output.jsonl").read_text(encoding="utf-8"))
+    assert result == {"text": ["Привет", ",", "мир", "!"]}
+    (tmp_path / "input.txt").write_text("a b\n", encoding="utf-8")
+    main([str(config), str(tmp_path / "input.txt"), str(tmp_path / "output.txt")])
+    assert (tmp_path / "output.txt").read_text(encoding="utf-8") == '["a", "b"]\n'
+
+
+def test_arrow_writes_offsets_as_lists():
+    pa = pytest.importorskip("pyarrow")
+    result = Fabric([{"tokenize_with_emoji": {"offsets": True}}]).process_arrow(pa.array(["a b", None, "c"]))
+    assert result.to_pylist() == [["a", "b"], None, ["c"]]
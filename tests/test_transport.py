@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from textfab.fabric import Fabric
+from textfab.transport import SharedTexts
+
+from .helpers import count_calls
+
+CONFIG = ["swap_enter_to_space", "remove_punct", "lower_string", "collapse_spaces"]
+TEXTS = ["Привет, Мир!\n\nТест  тест.", "A b  C", "", "emoji 😀\x00 text"] * 50
+
+
+def shared_blocks():
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+def test_shared_texts():
+    shared_texts = SharedTexts.pack(TEXTS)
+    assert shared_texts.unpack() == TEXTS
+    assert shared_texts.unpack(unlink=True) == TEXTS
+    with pytest.raises(FileNotFoundError):
+        shared_texts.unpack()
+    assert SharedTexts.pack([]).unpack(unlink=True) == []
+    assert SharedTexts.pack([["a", "b"]]) is None
+    texts = ["A\udce9", "\ud83d", "b"]
+    assert SharedTexts.pack(texts).unpack(unlink=True) == texts
+
+
+def test_shared_memory_transport():
+    blocks = shared_blocks()
+    expected = Fabric(CONFIG)(TEXTS)
+    fab = Fabric(CONFIG, transport="shared_memory")
+    assert fab(TEXTS, pool_size=2) == expected
+    assert fab(TEXTS, pool_size=2, schedule="length") == expected
+    assert sorted(fab.stream(TEXTS, pool_size=2, chunksize=9, ordered=False)) == sorted(expected)
+    with fab.start_workers(2):
+        assert fab(TEXTS) == expected
+    split_words = count_calls(str.split, "split_words")
+    tokenizer = Fabric(CONFIG + [split_words], transport="shared_memory")
+    assert tokenizer(TEXTS, pool_size=2) == Fabric(CONFIG + [split_words])(TEXTS)
+    assert fab(["A\udce9 b,"], pool_size=2) == ["a\udce9 b"]
+    assert shared_blocks() == blocks
+    with pytest.raises(ValueError):
+        Fabric(CONFIG, transport="pipe")
@@ -1,6 +1,10 @@
+import pytest
+
 from src.textfab.units import *
 from textfab.fabric import Fabric
 
+from .helpers import count_calls
+
 
 class TestUnits:
     def test_punck_remove(self):
@@ -40,6 +44,34 @@ class TestUnits:
             == "красивый мама красиво мыть рама\n"
         )
 
+    def test_lemmatize_by_mystem_batch(self):
+        unit = lemmatize_by_mystem()
+        texts = [
+            "Красивая мама красиво мыла раму",
+            "",
+            "Две строки\nтекста",
+            "Мама мыла раму. Папа ||| читал",
+        ]
+        assert unit.process_batch(texts) == [unit.process(text) for text in texts]
+
+    def test_lemmatize_by_mystem_word_cache(self, tmp_path):
+        path = str(tmp_path / "lemmas.json")
+        unit = lemmatize_by_mystem({"word_cache_size": 100, "word_cache_path": path})
+        assert unit.process("Красивая мама красиво мыла раму") == "красивый мама красиво мыть рама\n"
+        unit.save_word_cache()
+        unit = lemmatize_by_mystem({"word_cache_size": 100, "word_cache_path": path})
+        assert unit.word_cache["мыла"] == "мыть"
+        assert unit.process("Кто-то мыл раму2") == "кто-то мыть рама2\n"
+
+    def test_lemmatize_by_mystem_word_cache_is_saved_serially(self, tmp_path):
+        path = str(tmp_path / "lemmas.json")
+        conv = Fabric([{"lemmatize_by_mystem": {"word_cache_size": 100, "word_cache_path": path}}])
+        conv(["мама мыла раму"] * 4, pool_size=2)
+        assert len(conv.conveyer[0].word_cache) == 0
+        conv(["мама мыла раму"])
+        conv.conveyer[0].save_word_cache()
+        assert lemmatize_by_mystem({"word_cache_size": 100, "word_cache_path": path}).word_cache["мыла"] == "мыть"
+
     def test_remove_emoji(self):
         unit = remove_emoji()
         assert unit.process("Привет😀") == "Привет"
@@ -94,22 +126,22 @@ class TestUnits:
     def test_apply_butter_finger(self):
         unit = apply_butter_finger({"prob_token_pass": 0.5, "seed": 43})
         text = ["это", "тестовый", "набор", "для", "аугментаций"]
-        assert ["это", "тестовай", "набон", "дтя", "аугментаций"] == unit.process(text)
+        assert ["это", "тестоаый", "набор", "для", "аугментаций"] == unit.process(text)
 
     def test_apply_changing_token_char_case(self):
         unit = apply_changing_token_char_case({"try_numbers": 1, "seed": 42})
         text = ["это", "тестовый", "набор", "для", "аугментаций"]
-        assert ["Это", "теСтОвыЙ", "набор", "для", "ауГМентаций"] == unit.process(text)
+        assert ["это", "тестовый", "набоР", "для", "аугМентациЙ"] == unit.process(text)
 
     def test_apply_apply_random_token_deletion(self):
         unit = apply_random_token_deletion({"try_numbers": 2, "seed": 43})
         text = ["это", "тестовый", "набор", "для", "аугментаций"]
-        assert ["тестовый", "набор", "для"] == unit.process(text)
+        assert ["это", "тестовый", "для", "аугментаций"] == unit.process(text)
 
     def test_apply_random_token_swap(self):
         unit = apply_random_token_swap({"try_numbers": 1, "seed": 44})
         text = ["это", "тестовый", "набор", "для", "аугментаций"]
-        assert ["это", "тестовый", "набор", "аугментаций", "для"] == unit.process(text)
+        assert ["это", "тестовый", "аугментаций", "для", "набор"] == unit.process(text)
 
 
 def test_conv():
@@ -147,3 +179,127 @@ def test_param_units():
     config = ["remove_punct", {"remove_custom_regex": {"regex": "a"}}]
     conv = Fabric(config)
     assert conv(["This is a test string."]) == ["This is  test string"]
+
+
+def test_persistent_workers():
+    config = [
+        "swap_enter_to_space",
+        "remove_punct",
+        "collapse_spaces",
+    ]
+    conv = Fabric(config)
+    with conv.start_workers(2):
+        assert conv(["This text, is\n\n for test"]) == ["This text is for test"]
+        assert conv(["This another text, is\n\n for test"]) == [
+            "This another text is for test"
+        ]
+    assert conv._pool is None
+
+
+def test_process_batch():
+    count_batches = count_calls(str.upper)
+    conv = Fabric(["remove_punct", count_batches])
+    assert conv(["a, b", "c. d", "e"]) == ["A B", "C D", "E"]
+    assert count_batches.batch_sizes == [3]
+    assert remove_punct().process_batch(["a, b", "c."]) == ["a b", "c"]
+
+
+def test_stream():
+    config = [
+        "swap_enter_to_space",
+        "remove_punct",
+        "collapse_spaces",
+    ]
+    conv = Fabric(config)
+    texts = (f"Text, number\n\n {i}" for i in range(25))
+    expected = [f"Text number {i}" for i in range(25)]
+    assert list(conv.stream(texts, chunksize=4)) == expected
+    texts = (f"Text, number\n\n {i}" for i in range(25))
+    assert list(conv.stream(texts, pool_size=2, chunksize=4)) == expected
+    texts = (f"Text, number\n\n {i}" for i in range(25))
+    result = conv.stream(texts, pool_size=2, chunksize=4, ordered=False)
+    assert sorted(result) == sorted(expected)
+
+
+def test_deduplicate():
+    count_texts = count_calls()
+    conv = Fabric([count_texts, "remove_punct"])
+    texts = ["ok!", "спасибо", "ok!", "спасибо", "ok!"]
+    assert conv(texts, deduplicate=True) == ["ok", "спасибо", "ok", "спасибо", "ok"]
+    assert count_texts.calls == 2
+    assert conv(texts, deduplicate=True, pool_size=2) == conv(texts)
+    tokens = Fabric(["tokenize_with_emoji"])(["a b", "a b"], deduplicate=True)
+    tokens[0].append("c")
+    assert tokens == [["a", "b", "c"], ["a", "b"]]
+
+
+def test_profile():
+    config = [
+        "swap_enter_to_space",
+        "remove_punct",
+        "collapse_spaces",
+    ]
+    conv = Fabric(config, profile=True)
+    chunks = []
+    conv.add_profile_hook(chunks.append)
+    texts = ["This text, is\n\n for test"] * 10
+    conv(texts)
+    conv(texts, pool_size=2)
+    assert len(chunks) == 1 + 5
+    assert [stats.name for stats in conv.profile.units] == config
+    assert all(stats.texts == 20 for stats in conv.profile.units)
+    assert conv.profile.units[0].size_in == 20 * len(texts[0])
+    assert conv.profile.units[-1].size_out == 20 * len("This text is for test")
+    assert "remove_punct [calls=6 texts=20" in repr(conv.profile)
+
+
+def test_profile_percentiles():
+    from textfab.profiling import UnitStats
+
+    stats, other = UnitStats("unit"), UnitStats("unit")
+    for i in range(1, 100001):
+        stats.record(i * 1e-6, 1, 1, 1)
+    other.record(5.0, 1, 1, 1)
+    stats.merge(other)
+    assert stats.calls == 100001
+    assert len(stats.histogram) < 200
+    for q, exact in [(50, 0.05), (90, 0.09), (99, 0.099)]:
+        assert abs(stats.percentile(q) - exact) / exact < 0.05
+    assert abs(stats.percentile(100) - 5.0) / 5.0 < 0.05
+
+
+def test_unit_registry():
+    from textfab import units
+
+    assert units.get_unit("remove_punct") is units.remove_punct
+    assert "ProcessUnit" not in units.UNITS
+    with pytest.raises(ValueError):
+        Fabric(["remove_everything"])
+
+
+def test_lazy_imports():
+    import subprocess
+    import sys
+
+    code = (
+        "import sys; from textfab.fabric import Fabric; Fabric(['lower_string'])(['A']); "
+        "print(','.join(m for m in ('pandas', 'omegaconf', 'nltk', 'pymystem3') if m in sys.modules))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == ""
+
+
+def test_config_without_params(tmp_path):
+    import hashlib
+    import json
+
+    path = str(tmp_path / "config.yaml")
+    conv = Fabric(["tokenize_with_emoji", {"apply_random_token_swap": {}}, {"tokenize_with_emoji": {"offsets": True}}])
+    conv.save_to_config(path)
+    with open(path, encoding="utf-8") as f:
+        assert f.read().splitlines()[:2] == ["- tokenize_with_emoji", "- apply_random_token_swap"]
+    assert Fabric.load_from_config(path).fingerprint() == conv.fingerprint()
+    # the fingerprint of the units that got the optional params is kept
+    assert Fabric(["tokenize_with_emoji"]).fingerprint() == hashlib.sha256(
+        json.dumps(["tokenize_with_emoji"]).encode("utf-8")
+    ).hexdigest()